@@ -0,0 +1,181 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+from litestar import Request
+from litestar.connection import ASGIConnection
+from litestar.exceptions import (
+    HTTPException,
+    ServiceUnavailableException,
+    TooManyRequestsException,
+)
+from litestar.handlers.base import BaseRouteHandler
+
+DEADLINE_HEADER = "x-request-deadline"
+FORWARDED_HEADER = "x-forwarded-for"
+# Proxies allowed to name the real client in X-Forwarded-For
+TRUSTED_PROXIES = frozenset(
+    h.strip()
+    for h in os.environ.get("PACER_TRUSTED_PROXIES", "").split(",")
+    if h.strip()
+)
+
+
+class AdmissionController:
+    """Bounded queue in front of the classifier.
+
+    At most ``max_concurrency`` requests run inference at once and at most
+    ``max_queue`` wait behind them; anything beyond that is shed with a 503
+    instead of slowing down everyone already admitted.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        max_queue: int = 8,
+        max_per_client: int = 2,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_per_client = max_per_client
+
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._running = 0
+        self._per_client: dict[str, int] = {}
+        # EWMA of time spent holding a slot, used for Retry-After
+        self._service_time = 0.05
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    @property
+    def in_flight(self) -> int:
+        return self._running
+
+    def retry_after(self) -> int:
+        backlog = self._waiting + self._running
+        return max(1, math.ceil(backlog * self._service_time / self.max_concurrency))
+
+    def check(self, client: str) -> None:
+        """Raise 503/429 if ``client`` would be shed right now."""
+        headers = {"Retry-After": str(self.retry_after())}
+        if self._waiting >= self.max_queue:
+            raise ServiceUnavailableException(
+                detail="Classifier queue is full", headers=headers
+            )
+        if self._per_client.get(client, 0) >= self.max_per_client:
+            raise TooManyRequestsException(
+                detail="Too many concurrent requests for this client",
+                headers=headers,
+            )
+
+    @asynccontextmanager
+    async def admit(
+        self, client: str, deadline: Optional[float] = None
+    ) -> AsyncIterator[None]:
+        self.check(client)
+        self._per_client[client] = self._per_client.get(client, 0) + 1
+        self._waiting += 1
+        acquired = False
+        try:
+            timeout = None if deadline is None else deadline - time.time()
+            try:
+                if timeout is not None and timeout <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(self._slots.acquire(), timeout)
+                acquired = True
+            except asyncio.TimeoutError:
+                raise _deadline_exceeded() from None
+            finally:
+                self._waiting -= 1
+
+            # The slot may have been granted right at the deadline
+            if deadline is not None and time.time() >= deadline:
+                raise _deadline_exceeded()
+
+            self._running += 1
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self._running -= 1
+                elapsed = time.perf_counter() - start
+                self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        finally:
+            if acquired:
+                self._slots.release()
+            remaining = self._per_client[client] - 1
+            if remaining:
+                self._per_client[client] = remaining
+            else:
+                del self._per_client[client]
+
+
+def _deadline_exceeded() -> HTTPException:
+    return HTTPException(
+        detail="Request deadline passed before inference", status_code=504
+    )
+
+
+def client_key(connection: ASGIConnection) -> str:
+    # The peer address, never a value the client picks itself; only a trusted
+    # proxy may name the real client, as the last hop it did not add itself
+    host = connection.client.host if connection.client else "unknown"
+    if host in TRUSTED_PROXIES:
+        hops = connection.headers.get(FORWARDED_HEADER, "").split(",")
+        for hop in reversed([h.strip() for h in hops if h.strip()]):
+            if hop not in TRUSTED_PROXIES:
+                return hop
+    return host
+
+
+def admission_guard(
+    controller: AdmissionController,
+) -> Callable[[ASGIConnection, BaseRouteHandler], None]:
+    """Route guard that sheds a request before its body is read and parsed.
+
+    ``admit`` checks again, since capacity can change during the upload.
+    """
+
+    def guard(connection: ASGIConnection, _: BaseRouteHandler) -> None:
+        controller.check(client_key(connection))
+
+    return guard
+
+
+def request_deadline(request: Request) -> Optional[float]:
+    """Absolute deadline (Unix seconds) from the ``X-Request-Deadline`` header."""
+    raw = request.headers.get(DEADLINE_HEADER)
+    if raw is None:
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        raise HTTPException(
+            detail=f"Invalid {DEADLINE_HEADER} header: {raw!r}",
+            status_code=400,
+        ) from None
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+ADMISSION = AdmissionController(
+    max_concurrency=_env_int("PACER_MAX_CONCURRENCY", 1),
+    max_queue=_env_int("PACER_MAX_QUEUE", 8),
+    max_per_client=_env_int("PACER_MAX_PER_CLIENT", 2),
+)
+
+# Saliency maps run hundreds of invokes on their own interpreter; a separate
+# pool keeps them from holding the slots /classify latency depends on
+SALIENCY_ADMISSION = AdmissionController(
+    max_concurrency=_env_int("PACER_SALIENCY_CONCURRENCY", 1),
+    max_queue=_env_int("PACER_SALIENCY_QUEUE", 2),
+    max_per_client=_env_int("PACER_SALIENCY_PER_CLIENT", 1),
+)
@@ -0,0 +1,248 @@
+import re
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+from ai_edge_litert.interpreter import Interpreter
+
+MODEL_DIR = Path("api/classifier/models")
+PREFERRED_MODEL = "final_model_20250903_225035"
+
+# <stem>_r<size> files are resolution variants from convert_to_tflite.py
+_VARIANT_RE = re.compile(r"_r\d+$")
+
+
+@dataclass(frozen=True)
+class TensorInfo:
+    shape: Tuple[int, ...]  # batch dimension included, -1 if dynamic
+    dtype: type
+    scale: float = 0.0
+    zero_point: int = 0
+
+    @property
+    def quantized(self) -> bool:
+        return self.dtype != np.float32 and self.scale != 0.0
+
+
+def find_model(suffix: str, model_dir: Path = MODEL_DIR) -> Path:
+    # prefer the explicit name if present, else the newest final_model_* by
+    # name; students, checkpoints and cascade/ensemble members never qualify
+    preferred = model_dir / f"{PREFERRED_MODEL}{suffix}"
+    if preferred.exists():
+        return preferred
+
+    candidates = sorted(
+        p
+        for p in model_dir.glob(f"final_model_*{suffix}")
+        if not _VARIANT_RE.search(p.stem)
+    )
+    if not candidates:
+        raise FileNotFoundError(f"No final_model_*{suffix} found in {model_dir}")
+    return candidates[-1]
+
+
+def find_variants(model_path: Path) -> list[Path]:
+    """Input-resolution variants exported alongside ``model_path``."""
+    return sorted(
+        p
+        for p in model_path.parent.glob(f"{model_path.stem}_r*{model_path.suffix}")
+        if _VARIANT_RE.search(p.stem)
+    )
+
+
+class InferenceBackend(ABC):
+    """A loaded model that scores preprocessed [N, H, W, C] batches."""
+
+    name: str
+    suffix: str
+
+    input: TensorInfo
+    output: TensorInfo
+
+    @classmethod
+    @abstractmethod
+    def load(cls, model_path: Path) -> "InferenceBackend": ...
+
+    @abstractmethod
+    def invoke(self, batch: np.ndarray) -> np.ndarray:
+        """Run ``batch`` (already in ``input.dtype``) and return raw outputs."""
+
+    @abstractmethod
+    def invoke_with(
+        self,
+        batch_size: int,
+        fill: Callable[[np.ndarray], None],
+        read: Callable[[np.ndarray], None],
+    ) -> None:
+        """Zero-copy invoke: ``fill`` writes into the input tensor in place and
+        ``read`` gets the raw output tensor before the next invoke reuses it.
+
+        Neither callback may keep a reference to the array it is given.
+        """
+
+    @property
+    def image_size(self) -> Tuple[int, int]:
+        # (width, height) as PIL expects
+        return (self.input.shape[2], self.input.shape[1])
+
+
+class LiteRTBackend(InferenceBackend):
+    name = "litert"
+    suffix = ".tflite"
+
+    def __init__(self, interpreter: Interpreter) -> None:
+        self._interp = interpreter
+        # The interpreter is not thread-safe; requests run in worker threads
+        self._lock = threading.Lock()
+
+        in_d = interpreter.get_input_details()[0]
+        out_d = interpreter.get_output_details()[0]
+        self._in_idx = in_d["index"]
+        self._out_idx = out_d["index"]
+        self._batch = int(in_d["shape"][0])
+
+        in_scale, in_zp = in_d.get("quantization", (0.0, 0))
+        out_scale, out_zp = out_d.get("quantization", (0.0, 0))
+        self.input = TensorInfo(
+            tuple(int(d) for d in in_d["shape_signature"]),
+            in_d["dtype"],
+            in_scale,
+            in_zp,
+        )
+        self.output = TensorInfo(
+            tuple(int(d) for d in out_d["shape_signature"]),
+            out_d["dtype"],
+            out_scale,
+            out_zp,
+        )
+
+    @classmethod
+    def load(cls, model_path: Path) -> "LiteRTBackend":
+        interp = Interpreter(model_path=str(model_path))
+        interp.allocate_tensors()
+        return cls(interp)
+
+    def _ensure_batch(self, n: int) -> None:
+        if n != self._batch:
+            shape = [n, *self.input.shape[1:]]
+            self._interp.resize_tensor_input(self._in_idx, shape)
+            self._interp.allocate_tensors()
+            self._batch = n
+
+    def invoke(self, batch: np.ndarray) -> np.ndarray:
+        with self._lock:
+            self._ensure_batch(batch.shape[0])
+            self._interp.set_tensor(self._in_idx, batch)
+            self._interp.invoke()
+            return self._interp.get_tensor(self._out_idx)
+
+    def invoke_with(self, batch_size, fill, read) -> None:
+        with self._lock:
+            self._ensure_batch(batch_size)
+            # tensor() views alias the interpreter's arena; they must be gone
+            # before invoke(), which the temporaries here guarantee
+            fill(self._interp.tensor(self._in_idx)())
+            self._interp.invoke()
+            read(self._interp.tensor(self._out_idx)())
+
+
+_ORT_DTYPES = {
+    "tensor(float)": np.float32,
+    "tensor(float16)": np.float16,
+    "tensor(uint8)": np.uint8,
+    "tensor(int8)": np.int8,
+}
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    name = "onnx"
+    suffix = ".onnx"
+
+    def __init__(self, session) -> None:
+        # InferenceSession.run is thread-safe, no lock needed
+        self._session = session
+        # Per-thread IO bindings over preallocated buffers, keyed by batch size
+        self._bindings = threading.local()
+        in_meta = session.get_inputs()[0]
+        out_meta = session.get_outputs()[0]
+        self._in_name = in_meta.name
+        self._out_name = out_meta.name
+        # Exported from the float Keras model, so never quantized at the edges
+        self.input = TensorInfo(
+            tuple(d if isinstance(d, int) else -1 for d in in_meta.shape),
+            _ORT_DTYPES[in_meta.type],
+        )
+        self.output = TensorInfo(
+            tuple(d if isinstance(d, int) else -1 for d in out_meta.shape),
+            _ORT_DTYPES[out_meta.type],
+        )
+
+    @classmethod
+    def load(cls, model_path: Path) -> "OnnxRuntimeBackend":
+        # Optional dependency, only needed when this backend is selected
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(
+            str(model_path), sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        return cls(session)
+
+    def invoke(self, batch: np.ndarray) -> np.ndarray:
+        return self._session.run([self._out_name], {self._in_name: batch})[0]
+
+    def _binding(self, batch_size: int):
+        import onnxruntime as ort
+
+        cache = self._bindings.__dict__
+        if batch_size not in cache:
+            x = np.empty((batch_size, *self.input.shape[1:]), self.input.dtype)
+            y = np.empty((batch_size, *self.output.shape[1:]), self.output.dtype)
+            binding = self._session.io_binding()
+            # OrtValues over numpy memory: ORT reads and writes our buffers
+            binding.bind_ortvalue_input(
+                self._in_name, ort.OrtValue.ortvalue_from_numpy(x)
+            )
+            binding.bind_ortvalue_output(
+                self._out_name, ort.OrtValue.ortvalue_from_numpy(y)
+            )
+            cache[batch_size] = (binding, x, y)
+        return cache[batch_size]
+
+    def invoke_with(self, batch_size, fill, read) -> None:
+        binding, x, y = self._binding(batch_size)
+        fill(x)
+        self._session.run_with_iobinding(binding)
+        read(y)
+
+
+BACKENDS: dict[str, type[InferenceBackend]] = {
+    LiteRTBackend.name: LiteRTBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+}
+
+
+def backend_name_for(model_path: Path) -> str:
+    for name, backend_cls in BACKENDS.items():
+        if backend_cls.suffix == model_path.suffix:
+            return name
+    raise ValueError(f"No inference backend handles {model_path.suffix} files")
+
+
+def load_backend(
+    name: str, model_path: Optional[Path] = None
+) -> InferenceBackend:
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown inference backend {name!r}, expected one of {sorted(BACKENDS)}"
+        ) from None
+    if model_path is None:
+        model_path = find_model(backend_cls.suffix)
+    print(f"Loading {name} model from: {model_path}")
+    return backend_cls.load(model_path)
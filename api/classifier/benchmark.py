@@ -0,0 +1,182 @@
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from api.classifier.backends import BACKENDS, InferenceBackend, load_backend
+from api.classifier.service import (
+    _mobilenet_v2_preprocess,
+    _read_output,
+    _score,
+    _write_input,
+)
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark inference backends on the same model"
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=sorted(BACKENDS),
+        choices=sorted(BACKENDS),
+        help="Backends to compare",
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        nargs="+",
+        type=int,
+        default=[1, 4, 16],
+        help="Batch sizes to invoke with",
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=list(MODES),
+        choices=MODES,
+        help="Copying path vs. in-place tensor access",
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=50, help="Timed invokes per batch size"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=5, help="Untimed invokes per batch size"
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write results as JSON here"
+    )
+    return parser.parse_args()
+
+
+MODES = ("copy", "zero_copy")
+
+
+def random_pixels(backend: InferenceBackend, batch_size: int) -> np.ndarray:
+    """Random uint8 RGB images at the backend's input size."""
+    shape = (batch_size, *backend.input.shape[1:])
+    return np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+
+
+def make_step(backend: InferenceBackend, pixels: np.ndarray, mode: str):
+    """One preprocess + invoke + dequantize step, by copies or in place."""
+    if mode == "copy":
+        # Fresh arrays for the float image, preprocessing, quantized input
+        # and output, like the original classify path
+        def step():
+            x = _mobilenet_v2_preprocess(pixels.astype(np.float32))
+            return _score(backend, x)
+
+        return step
+
+    # Scratch buffers allocated once, tensors written and read in place
+    scratch = np.empty(pixels.shape, np.float32)
+    scores = np.empty((len(pixels), *backend.output.shape[1:]), np.float32)
+
+    def step():
+        backend.invoke_with(
+            len(pixels),
+            lambda x: _write_input(pixels, x, backend.input, scratch),
+            lambda y: _read_output(y, backend.output, scores),
+        )
+        return scores
+
+    return step
+
+
+def measure_allocations(step, calls: int = 20) -> dict:
+    """Transient Python/numpy heap per call (tracemalloc) and GC activity."""
+    gen0_before = gc.get_stats()[0]["collections"]
+    tracemalloc.start()
+    peaks = []
+    for _ in range(calls):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        step()
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return {
+        "alloc_kb_per_call": round(float(np.mean(peaks)) / 1024, 1),
+        "gc_gen0_per_1k_calls": round(
+            (gc.get_stats()[0]["collections"] - gen0_before) * 1000 / calls, 1
+        ),
+    }
+
+
+def benchmark_backend(
+    backend: InferenceBackend,
+    batch_size: int,
+    iterations: int,
+    warmup: int,
+    mode: str = "zero_copy",
+) -> dict:
+    """Time repeated steps of one batch size, then count their allocations."""
+    step = make_step(backend, random_pixels(backend, batch_size), mode)
+    for _ in range(warmup):
+        step()
+
+    latencies = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        start = time.perf_counter()
+        step()
+        latencies[i] = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+    return {
+        "backend": backend.name,
+        "mode": mode,
+        "batch_size": batch_size,
+        "iterations": iterations,
+        "latency_ms_p50": round(float(p50), 3),
+        "latency_ms_p95": round(float(p95), 3),
+        "latency_ms_p99": round(float(p99), 3),
+        "images_per_sec": round(batch_size * iterations / float(latencies.sum()), 1),
+        **measure_allocations(step),
+    }
+
+
+def main():
+    """Benchmark every requested backend that can be loaded here."""
+    args = parse_arguments()
+
+    results = []
+    for name in args.backends:
+        try:
+            backend = load_backend(name)
+        except (FileNotFoundError, ImportError) as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        for batch_size in args.batch_sizes:
+            for mode in args.modes:
+                results.append(
+                    benchmark_backend(
+                        backend, batch_size, args.iterations, args.warmup, mode
+                    )
+                )
+
+    print("\n" + "=" * 92)
+    print(
+        f"{'backend':<10}{'mode':<11}{'batch':>6}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'img/s':>10}{'alloc KB':>12}{'gc0/1k':>10}"
+    )
+    print("=" * 92)
+    for r in results:
+        print(
+            f"{r['backend']:<10}{r['mode']:<11}{r['batch_size']:>6}"
+            f"{r['latency_ms_p50']:>10}{r['latency_ms_p95']:>10}"
+            f"{r['latency_ms_p99']:>10}{r['images_per_sec']:>10}"
+            f"{r['alloc_kb_per_call']:>12}{r['gc_gen0_per_1k_calls']:>10}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import argparse
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from api.classifier.backends import (
+    MODEL_DIR,
+    InferenceBackend,
+    backend_name_for,
+    find_model,
+    load_backend,
+)
+from api.classifier.service import (
+    _BACKEND,
+    CASCADE_CONFIG,
+    _check_classes,
+    _load_rgb,
+    _score,
+    _to_input,
+)
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".dcm"}
+
+# final_model_20250903_225035[_r160] -> classes_20250903_225035.json
+_TIMESTAMP_RE = re.compile(r"(\d{8}_\d{6})")
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Calibrate the confidence gate of the two-stage cascade"
+    )
+    parser.add_argument(
+        "--data",
+        type=str,
+        default="api/classifier/datasets/kaggle/Test",
+        help="Labelled directory with one sub-folder per class",
+    )
+    parser.add_argument(
+        "--stage1",
+        type=str,
+        required=True,
+        help="Cheap first-stage model, e.g. a distilled student_model_*.tflite",
+    )
+    parser.add_argument(
+        "--target-accuracy",
+        type=float,
+        default=None,
+        help="Minimum cascade accuracy (default: full model minus --max-drop)",
+    )
+    parser.add_argument(
+        "--max-drop",
+        type=float,
+        default=0.005,
+        help="Allowed accuracy drop vs. the full model when no target is given",
+    )
+    parser.add_argument(
+        "--classes",
+        type=str,
+        default=None,
+        help="Training classes_*.json (default: the one next to the served model)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=32, help="Images per invoke"
+    )
+    return parser.parse_args()
+
+
+def load_class_names(model_path, classes_path=None):
+    """Training class order, from ``classes_path`` or the classes_<timestamp>.json
+    saved next to ``model_path``; None if neither exists."""
+    if classes_path is None:
+        match = _TIMESTAMP_RE.search(Path(model_path).stem)
+        if match is None:
+            return None
+        classes_path = Path(model_path).parent / f"classes_{match.group(1)}.json"
+    if not Path(classes_path).exists():
+        return None
+    return json.loads(Path(classes_path).read_text())["classes"]
+
+
+def load_labelled_paths(data_dir, num_classes, class_names=None):
+    """Image paths and class ids for a directory with one folder per class.
+
+    With ``class_names`` folders map to ids by name, so a missing class folder
+    cannot shift the others. Without it ids follow the sorted folder order,
+    which is only trusted when every one of ``num_classes`` has a folder.
+    """
+    class_dirs = sorted(d for d in Path(data_dir).iterdir() if d.is_dir())
+    if class_names is not None:
+        if len(class_names) != num_classes:
+            raise ValueError(
+                f"Class mapping lists {len(class_names)} classes, "
+                f"model has {num_classes} outputs"
+            )
+        ids = {name: i for i, name in enumerate(class_names)}
+        unknown = [d.name for d in class_dirs if d.name not in ids]
+        if unknown:
+            raise ValueError(f"Folders not in the class mapping: {unknown}")
+        class_ids = [ids[d.name] for d in class_dirs]
+    elif len(class_dirs) != num_classes:
+        raise ValueError(
+            f"{data_dir} has {len(class_dirs)} class folders but the model has "
+            f"{num_classes} outputs; pass --classes to map folders by name"
+        )
+    else:
+        class_ids = list(range(len(class_dirs)))
+
+    paths, labels = [], []
+    for class_id, class_dir in zip(class_ids, class_dirs):
+        for path in sorted(class_dir.iterdir()):
+            if path.suffix.lower() in IMAGE_SUFFIXES:
+                paths.append(path)
+                labels.append(class_id)
+    return paths, np.array(labels, dtype=np.int64)
+
+
+def _decode(path, size):
+    return _to_input(_load_rgb(path.read_bytes(), size), size)
+
+
+def score_paths(backend: InferenceBackend, paths, batch_size):
+    """Scores for every image, decoding in threads and invoking in batches."""
+    size = backend.image_size
+    scores = []
+    with ThreadPoolExecutor() as pool:
+        for start in range(0, len(paths), batch_size):
+            chunk = paths[start : start + batch_size]
+            batch = np.stack(list(pool.map(lambda p: _decode(p, size), chunk)))
+            scores.append(_score(backend, batch))
+    return np.concatenate(scores)
+
+
+def calibrate(stage1_scores, stage2_scores, labels, target_accuracy):
+    """Loosest (min_score, min_margin) gate that keeps accuracy >= target."""
+    top2 = np.sort(stage1_scores, axis=1)[:, -2:]
+    top, margin = top2[:, 1], top2[:, 1] - top2[:, 0]
+    stage1_ok = stage1_scores.argmax(axis=1) == labels
+    stage2_ok = stage2_scores.argmax(axis=1) == labels
+
+    # Candidate thresholds at the observed quantiles, plus "never accept"
+    quantiles = np.linspace(0.0, 1.0, 101)
+    score_grid = np.append(np.unique(np.quantile(top, quantiles)), np.inf)
+    margin_grid = np.unique(np.quantile(margin, quantiles))
+
+    best = None  # (accept_rate, accuracy, min_score, min_margin)
+    for min_score in score_grid:
+        # [M, N] acceptance for every margin gate at this score gate
+        accept = (top >= min_score)[None, :] & (
+            margin[None, :] >= margin_grid[:, None]
+        )
+        accuracy = np.where(accept, stage1_ok, stage2_ok).mean(axis=1)
+        accept_rate = accept.mean(axis=1)
+        # Among gates meeting the target, accept the most images on stage 1
+        for m in np.flatnonzero(accuracy >= target_accuracy):
+            candidate = (accept_rate[m], accuracy[m], min_score, margin_grid[m])
+            if best is None or candidate[:2] > best[:2]:
+                best = candidate
+    if best is None:
+        raise ValueError(f"No gate reaches accuracy {target_accuracy:.4f}")
+    accept_rate, accuracy, min_score, min_margin = best
+    return {
+        "min_score": float(min_score),
+        "min_margin": float(min_margin),
+        "expected_accuracy": float(accuracy),
+        "expected_stage2_rate": float(1.0 - accept_rate),
+        "stage1_accuracy": float(stage1_ok.mean()),
+        "full_accuracy": float(stage2_ok.mean()),
+    }
+
+
+def main():
+    """Score a labelled split with both stages and write cascade.json."""
+    args = parse_arguments()
+
+    stage1_path = Path(args.stage1)
+    if stage1_path.parent.resolve() != MODEL_DIR.resolve():
+        raise ValueError(f"Stage-1 model must live in {MODEL_DIR} to be served")
+    stage1 = load_backend(backend_name_for(stage1_path), stage1_path)
+    _check_classes(stage1, stage1_path)
+
+    class_names = load_class_names(find_model(_BACKEND.suffix), args.classes)
+    paths, labels = load_labelled_paths(
+        args.data, _BACKEND.output.shape[-1], class_names
+    )
+    print(f"Scoring {len(paths)} images from {args.data}...")
+    stage1_scores = score_paths(stage1, paths, args.batch_size)
+    stage2_scores = score_paths(_BACKEND, paths, args.batch_size)
+
+    full_accuracy = float((stage2_scores.argmax(axis=1) == labels).mean())
+    target = (
+        args.target_accuracy
+        if args.target_accuracy is not None
+        else full_accuracy - args.max_drop
+    )
+    result = calibrate(stage1_scores, stage2_scores, labels, target)
+
+    config = {
+        "stage1_model": stage1_path.name,
+        "target_accuracy": target,
+        "images": len(paths),
+        **result,
+    }
+    CASCADE_CONFIG.write_text(json.dumps(config, indent=2))
+
+    print("\n" + "=" * 50)
+    print(f"Full model accuracy:    {result['full_accuracy']:.4f}")
+    print(f"Stage-1 accuracy:       {result['stage1_accuracy']:.4f}")
+    print(f"Cascade accuracy:       {result['expected_accuracy']:.4f}")
+    print(f"Stage-2 rate:           {result['expected_stage2_rate']:.2%}")
+    print(f"Gate: score >= {result['min_score']:.4f}, margin >= {result['min_margin']:.4f}")
+    print(f"Cascade config saved to: {CASCADE_CONFIG}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
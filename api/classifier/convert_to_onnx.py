@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import tensorflow as tf
+import tf2onnx
+
+# model_dir and candidate names
+model_dir = Path("api/classifier/models")
+possible_names = ["final_model_20250903_225035"]
+
+# Find the first matching file with .keras suffix
+model_path = None
+for name in possible_names:
+    candidate = model_dir / f"{name}.keras"
+    if candidate.exists():
+        model_path = candidate
+        break
+
+if not model_path:
+    raise FileNotFoundError(
+        f"No .keras model found in {model_dir} with names {possible_names}"
+    )
+
+print(f"Loading model from: {model_path}")
+model = tf.keras.models.load_model(model_path)
+
+# Keep the batch dimension dynamic so the backend can run batched invokes
+input_signature = [
+    tf.TensorSpec((None, *model.input_shape[1:]), tf.float32, name="input")
+]
+
+# Write output next to the .keras file, same stem as the .tflite export
+out_path = model_path.with_suffix(".onnx")
+tf2onnx.convert.from_keras(
+    model, input_signature=input_signature, opset=17, output_path=str(out_path)
+)
+
+print(
+    f"✅ Wrote ONNX model to: {out_path} (size: {out_path.stat().st_size / 1e6:.2f} MB)"
+)
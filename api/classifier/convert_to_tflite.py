@@ -1,18 +1,83 @@
+import argparse
+import json
+import re
 from pathlib import Path
 
 import tensorflow as tf
 
+
+def _resize_inputs(node, size, native):
+    # Rewrite every [N, H, W, C] input shape recorded at the native size
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if (
+                key in ("batch_shape", "shape", "input_shape")
+                and isinstance(value, (list, tuple))
+                and len(value) == 4
+                and tuple(value[1:3]) == native
+            ):
+                node[key] = [value[0], size, size, value[3]]
+            else:
+                _resize_inputs(value, size, native)
+    elif isinstance(node, list):
+        for value in node:
+            _resize_inputs(value, size, native)
+
+
+def at_resolution(model, size):
+    """Rebuild ``model`` for a different input size, sharing its weights.
+
+    MobileNetV2 with global pooling has no size-dependent weights, so the
+    same kernels run at any resolution (with some accuracy cost).
+    """
+    config = model.get_config()
+    _resize_inputs(config, size, tuple(model.input_shape[1:3]))
+    variant = model.__class__.from_config(config)
+    variant.set_weights(model.get_weights())
+    return variant
+
+
+def convert(model, out_path):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    # Optional: enable basic optimization (reduces size and speeds up inference)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    tflite_model = converter.convert()
+    out_path.write_bytes(tflite_model)
+
+    print(
+        f"✅ Wrote TFLite model to: {out_path} (size: {out_path.stat().st_size / 1e6:.2f} MB)"
+    )
+
+
+parser = argparse.ArgumentParser(description="Convert a .keras model to TFLite")
+parser.add_argument(
+    "--model",
+    type=str,
+    default=None,
+    help="Path to a .keras model, e.g. a distilled student_model_*.keras",
+)
+parser.add_argument(
+    "--resolutions",
+    type=int,
+    nargs="*",
+    default=[],
+    help="Extra square input sizes to export as <name>_r<size>.tflite variants",
+)
+args = parser.parse_args()
+
 # model_dir and candidate names
 model_dir = Path("api/classifier/models")
 possible_names = ["final_model_20250903_225035"]
 
 # Find the first matching file with .keras suffix
-model_path = None
-for name in possible_names:
-    candidate = model_dir / f"{name}.keras"
-    if candidate.exists():
-        model_path = candidate
-        break
+model_path = Path(args.model) if args.model else None
+if model_path is None:
+    for name in possible_names:
+        candidate = model_dir / f"{name}.keras"
+        if candidate.exists():
+            model_path = candidate
+            break
 
 if not model_path:
     raise FileNotFoundError(
@@ -22,17 +87,27 @@ if not model_path:
 print(f"Loading model from: {model_path}")
 model = tf.keras.models.load_model(model_path)
 
-# Convert to TFLite
-converter = tf.lite.TFLiteConverter.from_keras_model(model)
-# Optional: enable basic optimization (reduces size and speeds up inference)
-converter.optimizations = [tf.lite.Optimize.DEFAULT]
-
-tflite_model = converter.convert()
+# The served class ids (CLASS_DB) must line up with the training class mapping
+# (skipped for files without a run timestamp in their name)
+match = re.search(r"(\d{8}_\d{6})", model_path.stem)
+class_path = match and model_path.parent / f"classes_{match.group(1)}.json"
+if class_path and class_path.exists():
+    num_classes = json.loads(class_path.read_text())["num_classes"]
+    if model.output_shape[-1] != num_classes:
+        raise ValueError(
+            f"{model_path} has {model.output_shape[-1]} outputs but "
+            f"{class_path} lists {num_classes} classes"
+        )
 
 # Write output next to the .keras file
-out_path = model_path.with_suffix(".tflite")
-out_path.write_bytes(tflite_model)
+convert(model, model_path.with_suffix(".tflite"))
 
-print(
-    f"✅ Wrote TFLite model to: {out_path} (size: {out_path.stat().st_size / 1e6:.2f} MB)"
-)
+native_size = model.input_shape[1]
+for size in args.resolutions:
+    if size == native_size:
+        continue
+    print(f"Building {size}x{size} variant...")
+    convert(
+        at_resolution(model, size),
+        model_path.with_name(f"{model_path.stem}_r{size}.tflite"),
+    )
@@ -0,0 +1,246 @@
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from api.classifier.backends import (
+    InferenceBackend,
+    backend_name_for,
+    find_model,
+    load_backend,
+)
+from api.classifier.calibrate_cascade import load_class_names, load_labelled_paths
+from api.classifier.service import (
+    _VARIANTS,
+    _load_rgb,
+    _read_output,
+    _to_pixels,
+    _write_input,
+)
+from api.classifier.transformer import CLASS_DB, DEFAULT_META
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Evaluate a converted model on a labelled dataset split"
+    )
+    parser.add_argument(
+        "--data",
+        type=str,
+        default="api/classifier/datasets/kaggle/Test",
+        help="Labelled directory with one sub-folder per class",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=None,
+        help="Model file to evaluate (default: the served model; a variant "
+        "name such as r160 picks a served resolution variant)",
+    )
+    parser.add_argument(
+        "--classes",
+        type=str,
+        default=None,
+        help="Training classes_*.json (default: the one next to the model)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=32, help="Images per invoke"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Decode threads"
+    )
+    parser.add_argument(
+        "--bins", type=int, default=15, help="Confidence bins for calibration"
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write the report as JSON"
+    )
+    return parser.parse_args()
+
+
+def resolve_backend(model) -> InferenceBackend:
+    if model is None:
+        return next(iter(_VARIANTS.values()))
+    if model in _VARIANTS:
+        return _VARIANTS[model]
+    return load_backend(backend_name_for(Path(model)), Path(model))
+
+
+def _decode(path, size) -> np.ndarray:
+    # Same decode, RGB conversion and resize as PacemakerClassifier.classify
+    return _to_pixels(_load_rgb(path.read_bytes(), size), size)
+
+
+def predict(backend: InferenceBackend, paths, batch_size, workers=None):
+    """Scores for every image plus the wall time spent, decode included.
+
+    Decoding of the next batch overlaps with the invoke of the current one.
+    """
+    size = backend.image_size
+    scores = np.empty((len(paths), *backend.output.shape[1:]), np.float32)
+    scratch = np.empty((batch_size, *backend.input.shape[1:]), np.float32)
+    chunks = [paths[i : i + batch_size] for i in range(0, len(paths), batch_size)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+
+        def decode(chunk):
+            return pool.map(lambda p: _decode(p, size), chunk)
+
+        pending = decode(chunks[0]) if chunks else None
+        for i, chunk in enumerate(chunks):
+            pixels = np.stack(list(pending))
+            if i + 1 < len(chunks):
+                pending = decode(chunks[i + 1])
+            out = scores[i * batch_size : i * batch_size + len(chunk)]
+            backend.invoke_with(
+                len(chunk),
+                lambda x: _write_input(pixels, x, backend.input, scratch[: len(chunk)]),
+                lambda y: _read_output(y, backend.output, out),
+            )
+    return scores, time.perf_counter() - start
+
+
+def class_names(num_classes: int) -> list[str]:
+    return [CLASS_DB.get(i, DEFAULT_META).name for i in range(num_classes)]
+
+
+def confusion_matrix(labels, preds, num_classes) -> np.ndarray:
+    # Rows are true classes, columns predicted classes
+    return np.bincount(
+        labels * num_classes + preds, minlength=num_classes * num_classes
+    ).reshape(num_classes, num_classes)
+
+
+def calibration(scores, labels, bins) -> dict:
+    """Expected calibration error, reliability bins, NLL and Brier score."""
+    confidence = scores.max(axis=1)
+    correct = scores.argmax(axis=1) == labels
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    which = np.clip(np.digitize(confidence, edges[1:-1]), 0, bins - 1)
+
+    count = np.bincount(which, minlength=bins)
+    conf_sum = np.bincount(which, weights=confidence, minlength=bins)
+    acc_sum = np.bincount(which, weights=correct, minlength=bins)
+    filled = count > 0
+    gap = np.abs(acc_sum[filled] - conf_sum[filled]) / count[filled]
+
+    one_hot = np.eye(scores.shape[1], dtype=np.float32)[labels]
+    true_prob = scores[np.arange(len(labels)), labels]
+    return {
+        "ece": float((gap * count[filled]).sum() / len(labels)),
+        "mce": float(gap.max()),
+        "mean_confidence": float(confidence.mean()),
+        "nll": float(-np.log(np.clip(true_prob, 1e-7, 1.0)).mean()),
+        "brier": float(((scores - one_hot) ** 2).sum(axis=1).mean()),
+        "reliability": [
+            {
+                "bin": f"{edges[b]:.2f}-{edges[b + 1]:.2f}",
+                "count": int(count[b]),
+                "accuracy": float(acc_sum[b] / count[b]),
+                "confidence": float(conf_sum[b] / count[b]),
+            }
+            for b in np.flatnonzero(filled)
+        ],
+    }
+
+
+def evaluate(scores, labels, bins) -> dict:
+    """Accuracy, per-class precision/recall/F1, confusion matrix, calibration."""
+    num_classes = scores.shape[1]
+    names = class_names(num_classes)
+    preds = scores.argmax(axis=1)
+    cm = confusion_matrix(labels, preds, num_classes)
+
+    tp = np.diag(cm).astype(np.float64)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    precision = np.divide(tp, predicted, out=np.zeros_like(tp), where=predicted > 0)
+    recall = np.divide(tp, support, out=np.zeros_like(tp), where=support > 0)
+    denom = precision + recall
+    f1 = np.divide(2 * precision * recall, denom, out=np.zeros_like(tp), where=denom > 0)
+    top5 = np.argsort(scores, axis=1)[:, -5:]
+
+    present = support > 0
+    return {
+        "images": len(labels),
+        "accuracy": float((preds == labels).mean()),
+        "top5_accuracy": float((top5 == labels[:, None]).any(axis=1).mean()),
+        "macro_precision": float(precision[present].mean()),
+        "macro_recall": float(recall[present].mean()),
+        "macro_f1": float(f1[present].mean()),
+        "per_class": {
+            names[c]: {
+                "class_id": c,
+                "precision": float(precision[c]),
+                "recall": float(recall[c]),
+                "f1": float(f1[c]),
+                "support": int(support[c]),
+            }
+            for c in range(num_classes)
+        },
+        "confusion_matrix": {
+            names[t]: {names[p]: int(cm[t, p]) for p in np.flatnonzero(cm[t])}
+            for t in np.flatnonzero(support)
+        },
+        "calibration": calibration(scores, labels, bins),
+    }
+
+
+def main():
+    """Run the deployed model over a labelled split and report its metrics."""
+    args = parse_arguments()
+    backend = resolve_backend(args.model)
+
+    model_path = (
+        Path(args.model)
+        if args.model is not None and args.model not in _VARIANTS
+        else find_model(backend.suffix)
+    )
+    paths, labels = load_labelled_paths(
+        args.data,
+        backend.output.shape[-1],
+        load_class_names(model_path, args.classes),
+    )
+    print(f"Evaluating {backend.name} model on {len(paths)} images from {args.data}...")
+    scores, elapsed = predict(backend, paths, args.batch_size, args.workers)
+
+    report = {
+        "data": args.data,
+        "model": args.model or "served",
+        "backend": backend.name,
+        "image_size": list(backend.image_size),
+        "batch_size": args.batch_size,
+        "seconds": round(elapsed, 3),
+        "images_per_sec": round(len(paths) / elapsed, 1) if elapsed else 0.0,
+        **evaluate(scores, labels, args.bins),
+    }
+
+    print("\n" + "=" * 72)
+    print(f"{'class':<32}{'precision':>11}{'recall':>9}{'f1':>9}{'support':>9}")
+    print("=" * 72)
+    for name, m in report["per_class"].items():
+        if m["support"]:
+            print(
+                f"{name[:31]:<32}{m['precision']:>11.3f}{m['recall']:>9.3f}"
+                f"{m['f1']:>9.3f}{m['support']:>9}"
+            )
+    print("=" * 72)
+    cal = report["calibration"]
+    print(f"Accuracy:        {report['accuracy']:.4f} (top-5 {report['top5_accuracy']:.4f})")
+    print(f"Macro F1:        {report['macro_f1']:.4f}")
+    print(f"ECE:             {cal['ece']:.4f} (mean confidence {cal['mean_confidence']:.4f})")
+    print(f"NLL / Brier:     {cal['nll']:.4f} / {cal['brier']:.4f}")
+    print(f"Throughput:      {report['images_per_sec']} img/s ({report['seconds']} s)")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\nReport saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from ai_edge_litert.interpreter import Interpreter, OpResolverType
+
+from api.classifier.backends import MODEL_DIR
+
+BENCHMARK_BINARY_ENV = "TFLITE_BENCHMARK_MODEL"
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Per-operator profile of converted .tflite models"
+    )
+    parser.add_argument(
+        "models",
+        nargs="+",
+        help="Model files, or names inside api/classifier/models; "
+        "two models with --diff are compared",
+    )
+    parser.add_argument(
+        "--diff", action="store_true", help="Compare exactly two models"
+    )
+    parser.add_argument("--runs", type=int, default=50, help="Timed invokes")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed invokes")
+    parser.add_argument(
+        "--threads", type=int, default=1, help="Interpreter thread count"
+    )
+    parser.add_argument(
+        "--no-xnnpack",
+        action="store_true",
+        help="Disable the XNNPACK delegate so every builtin op runs (and is "
+        "reported) on its own",
+    )
+    parser.add_argument(
+        "--benchmark-binary",
+        type=str,
+        default=os.environ.get(BENCHMARK_BINARY_ENV) or shutil.which("benchmark_model"),
+        help="TFLite benchmark_model tool for measured per-op timings "
+        f"(default: ${BENCHMARK_BINARY_ENV} or PATH)",
+    )
+    parser.add_argument(
+        "--top", type=int, default=15, help="Slowest ops to list per model"
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write the profile(s) as JSON"
+    )
+    return parser.parse_args()
+
+
+def resolve_model(name: str) -> Path:
+    path = Path(name)
+    if path.exists():
+        return path
+    for candidate in (MODEL_DIR / name, MODEL_DIR / f"{name}.tflite"):
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f"No model {name!r} (also looked in {MODEL_DIR})")
+
+
+def _estimate_macs(op: dict, tensors: dict) -> int:
+    """Multiply-accumulates of one builtin op, from its tensor shapes."""
+    out_shape = tensors[op["outputs"][0]]["shape"]
+    inputs = [tensors[i]["shape"] for i in op["inputs"] if i >= 0]
+    name = op["op_name"]
+    if name == "DELEGATE":
+        # The delegated ops stay in the op list and carry the cost themselves
+        return 0
+    if name == "CONV_2D":
+        # weights [out_c, kh, kw, in_c]
+        return int(np.prod(out_shape)) * int(np.prod(inputs[1][1:]))
+    if name == "DEPTHWISE_CONV_2D":
+        # weights [1, kh, kw, out_c]
+        return int(np.prod(out_shape)) * int(inputs[1][1] * inputs[1][2])
+    if name == "FULLY_CONNECTED":
+        # weights [out, in]
+        return int(np.prod(out_shape)) * int(inputs[1][-1])
+    # Elementwise / reductions: roughly one op per input element
+    return int(max(np.prod(s) for s in inputs)) if inputs else 0
+
+
+def _memory_stats(interp: Interpreter, ops: list[dict]) -> dict:
+    tensors = interp.get_tensor_details()
+    produced = {int(t) for op in ops for t in op["outputs"]}
+    consumed = {int(t) for op in ops for t in op["inputs"]}
+    produced |= {d["index"] for d in interp.get_input_details()}
+    activations = constants = scratch = 0
+    for t in tensors:
+        nbytes = int(np.prod(t["shape"])) * np.dtype(t["dtype"]).itemsize
+        if t["index"] in produced:
+            activations += nbytes
+        elif t["index"] in consumed:
+            constants += nbytes
+        else:
+            # Kernel temporaries, e.g. hybrid (dynamic-range) quantized inputs
+            scratch += nbytes
+    return {
+        # Sum of every activation tensor: the arena before memory planning
+        # reuses buffers, so an upper bound on the real arena size
+        "activation_bytes_upper_bound": activations,
+        "constant_bytes": constants,
+        "kernel_scratch_bytes": scratch,
+    }
+
+
+def _rss_bytes() -> int | None:
+    # Current RSS is only cheap to read on Linux; elsewhere just the peak
+    if not sys.platform.startswith("linux"):
+        return None
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _rss_delta(start: int | None, end: int | None) -> int | None:
+    return None if start is None or end is None else end - start
+
+
+def _profile_in_process(path: str, runs: int, warmup: int, threads: int, xnnpack: bool):
+    rss_start = _rss_bytes()
+    interp = Interpreter(
+        model_path=path,
+        num_threads=threads,
+        experimental_op_resolver_type=OpResolverType.AUTO
+        if xnnpack
+        else OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES,
+    )
+    interp.allocate_tensors()
+    rss_loaded = _rss_bytes()
+
+    in_d = interp.get_input_details()[0]
+    if np.issubdtype(in_d["dtype"], np.integer):
+        info = np.iinfo(in_d["dtype"])
+        x = np.random.randint(info.min, info.max, in_d["shape"]).astype(in_d["dtype"])
+    else:
+        x = np.random.uniform(-1, 1, in_d["shape"]).astype(in_d["dtype"])
+
+    interp.set_tensor(in_d["index"], x)
+    for _ in range(warmup):
+        interp.invoke()
+    latencies = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        interp.invoke()
+        latencies[i] = time.perf_counter() - start
+    total_ms = float(np.mean(latencies)) * 1e3
+
+    # Python exposes no per-op timers: attribute the measured invoke time to
+    # ops by their share of estimated MACs (benchmark_model replaces this)
+    ops = interp._get_ops_details()
+    tensors = {t["index"]: t for t in interp.get_tensor_details()}
+    macs = [_estimate_macs(op, tensors) if op["outputs"].size else 0 for op in ops]
+    total_macs = max(sum(macs), 1)
+    op_rows = [
+        {
+            "index": op["index"],
+            "op": op["op_name"],
+            "macs": m,
+            "ms": total_ms * m / total_macs,
+            "source": "estimated",
+        }
+        for op, m in zip(ops, macs)
+    ]
+
+    return {
+        "model": path,
+        "size_bytes": Path(path).stat().st_size,
+        "xnnpack": xnnpack,
+        "threads": threads,
+        "latency_ms_mean": total_ms,
+        "latency_ms_p50": float(np.percentile(latencies, 50)) * 1e3,
+        "latency_ms_p95": float(np.percentile(latencies, 95)) * 1e3,
+        "subgraphs": {
+            # Only the primary subgraph's ops are visible from Python
+            "0": {"ops": len(ops), "ms": total_ms},
+        },
+        "ops": op_rows,
+        "memory": {
+            **_memory_stats(interp, ops),
+            "rss_after_load_bytes": _rss_delta(rss_start, rss_loaded),
+            "rss_after_invoke_bytes": _rss_delta(rss_start, _rss_bytes()),
+            "peak_rss_bytes": _peak_rss_bytes(),
+        },
+    }
+
+
+_SECTION_RE = re.compile(r"^(Primary graph|Subgraph \(index: (\d+).*\))")
+_PEAK_RE = re.compile(r"Peak memory footprint \(MB\):.*overall=([\d.]+)")
+
+
+def _parse_benchmark_output(text: str) -> tuple[list[dict], dict, float | None]:
+    """Per-op rows, per-subgraph ms and peak MB from benchmark_model's profile."""
+    rows, subgraph_ms = [], defaultdict(float)
+    subgraph, in_regular_runs, in_run_order = "0", False, False
+    for line in text.splitlines():
+        # The initialization profile (AllocateTensors, ModifyGraphWithDelegate,
+        # ...) comes first and has its own Run Order table
+        if "Operator-wise Profiling Info for Regular Benchmark Runs" in line:
+            in_regular_runs = True
+            continue
+        if not in_regular_runs:
+            continue
+        section = _SECTION_RE.match(line.strip())
+        if section:
+            subgraph = section.group(2) or "0"
+        if "Run Order" in line:
+            in_run_order = True
+            continue
+        if "Top by Computation Time" in line or "Summary by node type" in line:
+            in_run_order = False
+            continue
+        if not in_run_order:
+            continue
+        # [node type] [first] [avg ms] [%] [cdf%] [mem KB] [times called] [Name]
+        fields = [f.strip() for f in line.split("\t") if f.strip()]
+        if len(fields) < 8 or fields[0].startswith("["):
+            continue
+        try:
+            avg_ms = float(fields[2])
+        except ValueError:
+            continue
+        rows.append(
+            {
+                "index": len(rows),
+                "op": fields[0],
+                "ms": avg_ms,
+                "name": fields[7],
+                "subgraph": subgraph,
+                "source": "measured",
+            }
+        )
+        subgraph_ms[subgraph] += avg_ms
+    peak = _PEAK_RE.search(text)
+    return rows, dict(subgraph_ms), float(peak.group(1)) if peak else None
+
+
+def _profile_with_binary(binary: str, profile: dict, args) -> None:
+    cmd = [
+        binary,
+        f"--graph={profile['model']}",
+        f"--num_runs={args.runs}",
+        f"--warmup_runs={args.warmup}",
+        f"--num_threads={args.threads}",
+        f"--use_xnnpack={'false' if args.no_xnnpack else 'true'}",
+        "--enable_op_profiling=true",
+        "--report_peak_memory_footprint=true",
+    ]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    rows, subgraph_ms, peak_mb = _parse_benchmark_output(out.stdout + out.stderr)
+    if rows:
+        profile["ops"] = rows
+        profile["subgraphs"] = {
+            k: {"ops": sum(r["subgraph"] == k for r in rows), "ms": v}
+            for k, v in subgraph_ms.items()
+        }
+    if peak_mb is not None:
+        profile["memory"]["benchmark_peak_bytes"] = int(peak_mb * 1e6)
+
+
+def profile_model(path: Path, args) -> dict:
+    """Profile one model in a fresh process so memory numbers are its own."""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        profile = pool.apply(
+            _profile_in_process,
+            (str(path), args.runs, args.warmup, args.threads, not args.no_xnnpack),
+        )
+    if args.benchmark_binary:
+        _profile_with_binary(args.benchmark_binary, profile, args)
+    return profile
+
+
+def by_op_type(profile: dict) -> dict[str, dict]:
+    totals = defaultdict(lambda: {"count": 0, "ms": 0.0, "macs": 0})
+    for row in profile["ops"]:
+        totals[row["op"]]["count"] += 1
+        totals[row["op"]]["ms"] += row["ms"]
+        totals[row["op"]]["macs"] += row.get("macs", 0)
+    return dict(sorted(totals.items(), key=lambda kv: -kv[1]["ms"]))
+
+
+def print_profile(profile: dict, top: int) -> None:
+    mem = profile["memory"]
+    source = profile["ops"][0]["source"] if profile["ops"] else "n/a"
+    print("\n" + "=" * 64)
+    print(f"Model: {profile['model']} ({profile['size_bytes'] / 1e6:.2f} MB)")
+    print("=" * 64)
+    print(
+        f"Invoke: mean {profile['latency_ms_mean']:.2f} ms, "
+        f"p50 {profile['latency_ms_p50']:.2f} ms, p95 {profile['latency_ms_p95']:.2f} ms"
+    )
+    print(
+        f"Activations (unplanned upper bound): "
+        f"{mem['activation_bytes_upper_bound'] / 1e6:.2f} MB, "
+        f"constants: {mem['constant_bytes'] / 1e6:.2f} MB, "
+        f"kernel scratch: {mem['kernel_scratch_bytes'] / 1e6:.2f} MB"
+    )
+    loaded = mem["rss_after_load_bytes"]
+    print(
+        f"RSS after load: "
+        f"{'n/a' if loaded is None else f'{loaded / 1e6:.2f} MB'}, "
+        f"peak process RSS: {mem['peak_rss_bytes'] / 1e6:.2f} MB"
+    )
+    if "benchmark_peak_bytes" in mem:
+        print(f"benchmark_model peak footprint: {mem['benchmark_peak_bytes'] / 1e6:.2f} MB")
+    for index, sub in profile["subgraphs"].items():
+        print(f"Subgraph {index}: {sub['ops']} ops, {sub['ms']:.2f} ms")
+
+    print(f"\nBy op type ({source}):")
+    for op, t in by_op_type(profile).items():
+        print(f"  {op:<24}{t['count']:>5}{t['ms']:>10.3f} ms")
+
+    print(f"\nSlowest {top} ops ({source}):")
+    for row in sorted(profile["ops"], key=lambda r: -r["ms"])[:top]:
+        print(f"  #{row['index']:<5}{row['op']:<24}{row['ms']:>10.3f} ms")
+
+
+def print_diff(a: dict, b: dict) -> None:
+    print("\n" + "=" * 72)
+    print(f"A: {a['model']}\nB: {b['model']}")
+    print("=" * 72)
+    rows = [
+        ("size MB", a["size_bytes"] / 1e6, b["size_bytes"] / 1e6),
+        ("invoke ms (mean)", a["latency_ms_mean"], b["latency_ms_mean"]),
+        ("invoke ms (p95)", a["latency_ms_p95"], b["latency_ms_p95"]),
+        (
+            "activations MB",
+            a["memory"]["activation_bytes_upper_bound"] / 1e6,
+            b["memory"]["activation_bytes_upper_bound"] / 1e6,
+        ),
+        (
+            "constants MB",
+            a["memory"]["constant_bytes"] / 1e6,
+            b["memory"]["constant_bytes"] / 1e6,
+        ),
+        (
+            "peak RSS MB",
+            a["memory"]["peak_rss_bytes"] / 1e6,
+            b["memory"]["peak_rss_bytes"] / 1e6,
+        ),
+    ]
+    print(f"{'':<24}{'A':>12}{'B':>12}{'B/A':>10}")
+    for label, va, vb in rows:
+        print(f"{label:<24}{va:>12.2f}{vb:>12.2f}{vb / va if va else 0:>10.2f}")
+
+    ta, tb = by_op_type(a), by_op_type(b)
+    empty = {"count": 0, "ms": 0.0, "macs": 0}
+    measured = all(
+        row["source"] == "measured" for profile in (a, b) for row in profile["ops"]
+    )
+    if not measured:
+        # MAC-share times only restate the MAC counts, so they cannot show
+        # which op regressed; compare the op inventory and work instead
+        print(
+            "\nPer-op times are estimated (no benchmark_model): comparing op "
+            "counts and estimated MACs only"
+        )
+        print(f"{'op type':<24}{'A n':>5}{'A MMACs':>12}{'B n':>5}{'B MMACs':>12}")
+        for op in sorted(set(ta) | set(tb), key=lambda o: -tb.get(o, empty)["macs"]):
+            ea, eb = ta.get(op, empty), tb.get(op, empty)
+            print(
+                f"{op:<24}{ea['count']:>5}{ea['macs'] / 1e6:>12.1f}"
+                f"{eb['count']:>5}{eb['macs'] / 1e6:>12.1f}"
+            )
+        return
+
+    print(
+        f"\n{'op type (measured)':<24}{'A n':>5}{'A ms':>10}{'B n':>5}{'B ms':>10}"
+        f"{'delta':>10}"
+    )
+    for op in sorted(set(ta) | set(tb), key=lambda o: -tb.get(o, empty)["ms"]):
+        ea, eb = ta.get(op, empty), tb.get(op, empty)
+        print(
+            f"{op:<24}{ea['count']:>5}{ea['ms']:>10.3f}{eb['count']:>5}"
+            f"{eb['ms']:>10.3f}{eb['ms'] - ea['ms']:>+10.3f}"
+        )
+
+
+def main():
+    """Profile one or more models, or diff two of them."""
+    args = parse_arguments()
+    if args.diff and len(args.models) != 2:
+        raise SystemExit("--diff needs exactly two models")
+    if not args.benchmark_binary:
+        print(
+            "benchmark_model not found: per-op times are estimated from each "
+            f"op's share of MACs (set ${BENCHMARK_BINARY_ENV} for measured times)"
+        )
+
+    profiles = [profile_model(resolve_model(m), args) for m in args.models]
+    if args.diff:
+        print_diff(*profiles)
+    else:
+        for profile in profiles:
+            print_profile(profile, args.top)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(profiles, indent=2))
+        print(f"\nProfile saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,70 @@
 # api/classifier/pacemaker_classifier.py
+import hashlib
 import io
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import numpy as np
-from ai_edge_litert.interpreter import Interpreter
 from PIL import Image
 
-from api.types import ClassScore
+from api.classifier.backends import (
+    BACKENDS,
+    MODEL_DIR,
+    InferenceBackend,
+    TensorInfo,
+    backend_name_for,
+    find_model,
+    find_variants,
+    load_backend,
+)
+from api.classifier.dicom import is_dicom, read_dicom_image
+from api.types import ClassScore, TileRegion
 
 
-# ---- Load the newest .tflite once (warm start) ----
-def _find_tflite_model() -> Path:
-    model_dir = Path("api/classifier/models")
-    # prefer your explicit name if present
-    preferred = model_dir / "final_model_20250903_225035.tflite"
-    if preferred.exists():
-        return preferred
+# ---- Load the model once (warm start); PACER_BACKEND picks the runtime ----
+def _load_variants() -> dict[str, InferenceBackend]:
+    name = os.environ.get("PACER_BACKEND", "litert")
+    model_path = find_model(BACKENDS[name].suffix)
+    backends = [
+        load_backend(name, path)
+        for path in [model_path, *find_variants(model_path)]
+    ]
+    # Highest resolution (best quality) first
+    backends.sort(key=lambda b: b.image_size[1], reverse=True)
+    return {f"r{b.image_size[1]}": b for b in backends}
 
-    candidates = sorted(model_dir.glob("*.tflite"))
-    if not candidates:
-        raise FileNotFoundError(f"No .tflite model found in {model_dir}")
-    return candidates[-1]
 
+_VARIANTS = _load_variants()
+_BACKEND = next(iter(_VARIANTS.values()))
 
-def _load_interpreter() -> Interpreter:
-    model_path = _find_tflite_model()
-    print(f"Loading TFLite model from: {model_path}")
-    interp = Interpreter(model_path=str(model_path))
-    interp.allocate_tensors()
-    return interp
+# Drop one resolution step per this many requests waiting for a slot
+_DEGRADE_STEP = int(os.environ.get("PACER_DEGRADE_STEP", 2))
+QUALITY_HINTS = ("high", "balanced", "fast")
 
+_IN = _BACKEND.input
+_OUT = _BACKEND.output
 
-_INTERP = _load_interpreter()
+_IMG_SIZE = _BACKEND.image_size
 
-_IN = _INTERP.get_input_details()[0]
-_OUT = _INTERP.get_output_details()[0]
 
-_IN_IDX = _IN["index"]
-_OUT_IDX = _OUT["index"]
+def _load_image(img_bytes: bytes, size=_IMG_SIZE) -> Image.Image:
+    # DICOM goes straight to pixels, decoded near the model's input size
+    if is_dicom(img_bytes):
+        return read_dicom_image(img_bytes, size=size)
+    return Image.open(io.BytesIO(img_bytes))
 
-_IN_DTYPE = _IN["dtype"]
-_OUT_DTYPE = _OUT["dtype"]
 
-_IN_SCALE, _IN_ZP = _IN.get("quantization", (0.0, 0))
-_OUT_SCALE, _OUT_ZP = _OUT.get("quantization", (0.0, 0))
+def _load_rgb(img_bytes: bytes, size=_IMG_SIZE) -> Image.Image:
+    img = _load_image(img_bytes, size)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img
 
 
 def _mobilenet_v2_preprocess(x: np.ndarray) -> np.ndarray:
@@ -52,54 +72,611 @@ def _mobilenet_v2_preprocess(x: np.ndarray) -> np.ndarray:
     return (x / 127.5) - 1.0
 
 
-def _quantize_if_needed(x_float: np.ndarray) -> np.ndarray:
+def _quantize_if_needed(x_float: np.ndarray, info: TensorInfo = _IN) -> np.ndarray:
     # If the model expects float32, just return float32
-    if _IN_DTYPE == np.float32 or _IN_SCALE == 0.0:
+    if not info.quantized:
         return x_float.astype(np.float32)
 
     # Otherwise: q = x/scale + zero_point
-    q = np.round(x_float / _IN_SCALE + _IN_ZP)
-    info = np.iinfo(_IN_DTYPE) if np.issubdtype(_IN_DTYPE, np.integer) else None
-    if info is not None:
-        q = np.clip(q, info.min, info.max)
-        q = q.astype(_IN_DTYPE)
-    else:
-        q = q.astype(_IN_DTYPE)
-    return q
-
-
-def _dequantize_if_needed(y_raw: np.ndarray) -> np.ndarray:
-    if _OUT_DTYPE == np.float32 or _OUT_SCALE == 0.0:
+    q = np.round(x_float / info.scale + info.zero_point)
+    if np.issubdtype(info.dtype, np.integer):
+        dinfo = np.iinfo(info.dtype)
+        q = np.clip(q, dinfo.min, dinfo.max)
+    return q.astype(info.dtype)
+
+
+def _dequantize_if_needed(y_raw: np.ndarray, info: TensorInfo = _OUT) -> np.ndarray:
+    if not info.quantized:
         return y_raw.astype(np.float32)
-    return (y_raw.astype(np.float32) - _OUT_ZP) * _OUT_SCALE
+    return (y_raw.astype(np.float32) - info.zero_point) * info.scale
+
+
+def _to_input(img: Image.Image, size=_IMG_SIZE) -> np.ndarray:
+    # RGB image -> [H,W,C] float32 in [-1,1] at the model's input size
+    img = img.resize(size)
+    x = np.asarray(img, dtype=np.float32)  # [H,W,C], 0..255
+    return _mobilenet_v2_preprocess(x)  # [-1,1]
+
+
+def _score(backend: InferenceBackend, x: np.ndarray) -> np.ndarray:
+    # [N,H,W,C] preprocessed batch -> [N,classes] float32 scores
+    y = backend.invoke(_quantize_if_needed(x, backend.input))
+    return _dequantize_if_needed(y, backend.output)
+
+
+# ---- Single-image path: no per-request arrays beyond the resized pixels ----
+_SCRATCH = threading.local()
+
+
+def _scratch(backend: InferenceBackend) -> tuple[np.ndarray, np.ndarray]:
+    # Per-thread (quantization scratch, float scores) buffers for a backend
+    buffers = _SCRATCH.__dict__.get(id(backend))
+    if buffers is None:
+        buffers = (
+            np.empty(backend.input.shape[1:], np.float32),
+            np.empty(backend.output.shape[1:], np.float32),
+        )
+        _SCRATCH.__dict__[id(backend)] = buffers
+    return buffers
+
+
+def _to_pixels(img: Image.Image, size=_IMG_SIZE) -> np.ndarray:
+    # RGB image -> [H,W,C] uint8 at the model's input size
+    return np.asarray(img.resize(size))
+
+
+def _write_input(
+    pixels: np.ndarray, dst: np.ndarray, info: TensorInfo, scratch: np.ndarray
+) -> None:
+    # uint8 pixels -> MobileNetV2 [-1,1] (quantized if needed), in place into dst
+    if not info.quantized:
+        np.multiply(pixels, np.float32(1 / 127.5), out=dst)
+        np.subtract(dst, np.float32(1.0), out=dst)
+        return
+
+    # q = (p/127.5 - 1)/scale + zero_point, folded into one multiply-add
+    np.multiply(pixels, np.float32(1 / (127.5 * info.scale)), out=scratch)
+    np.add(scratch, np.float32(info.zero_point - 1 / info.scale), out=scratch)
+    np.rint(scratch, out=scratch)
+    if np.issubdtype(info.dtype, np.integer):
+        dinfo = np.iinfo(info.dtype)
+        np.clip(scratch, dinfo.min, dinfo.max, out=scratch)
+    np.copyto(dst, scratch, casting="unsafe")
+
+
+def _read_output(raw: np.ndarray, info: TensorInfo, out: np.ndarray) -> None:
+    # Raw output tensor view -> float32 scores in our own buffer
+    if not info.quantized:
+        np.copyto(out, raw, casting="unsafe")
+        return
+    np.subtract(raw, np.float32(info.zero_point), out=out)
+    np.multiply(out, np.float32(info.scale), out=out)
+
+
+def _score_pixels(backend: InferenceBackend, pixels: np.ndarray) -> np.ndarray:
+    """Scores for one uint8 image, read and written through the tensors in place.
+
+    The result is a per-thread buffer that the next call on this thread reuses.
+    """
+    scratch, scores = _scratch(backend)
+    backend.invoke_with(
+        1,
+        lambda x: _write_input(pixels, x[0], backend.input, scratch),
+        lambda y: _read_output(y[0], backend.output, scores),
+    )
+    return scores
+
+
+class _Cascade:
+    """Cheap first-stage model; the full model only runs when it is unsure."""
+
+    def __init__(
+        self, backend: InferenceBackend, min_score: float, min_margin: float
+    ) -> None:
+        self.backend = backend
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self._lock = threading.Lock()
+        self._stage1 = 0
+        self._stage2 = 0
+
+    def confident(self, preds: np.ndarray) -> bool:
+        top2 = np.partition(preds, -2)[-2:]
+        return top2[1] >= self.min_score and top2[1] - top2[0] >= self.min_margin
+
+    def run(self, img: Image.Image) -> Optional[np.ndarray]:
+        """Stage-1 scores if confident enough, else None (caller escalates)."""
+        preds = _score_pixels(
+            self.backend, _to_pixels(img, self.backend.image_size)
+        )
+        accepted = self.confident(preds)
+        with self._lock:
+            if accepted:
+                self._stage1 += 1
+            else:
+                self._stage2 += 1
+        return preds if accepted else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._stage1 + self._stage2
+            return {
+                "requests": total,
+                "stage1_accepted": self._stage1,
+                "stage2_invoked": self._stage2,
+                "stage2_rate": self._stage2 / total if total else 0.0,
+                "min_score": self.min_score,
+                "min_margin": self.min_margin,
+            }
+
+
+CASCADE_CONFIG = MODEL_DIR / "cascade.json"
+
+
+def _check_classes(backend: InferenceBackend, model_path: Path) -> None:
+    # CLASS_DB is keyed on the served model's class ids, so every extra model
+    # must score the same classes or its answers map to the wrong devices
+    if backend.output.shape[-1] != _OUT.shape[-1]:
+        raise ValueError(
+            f"{model_path} scores {backend.output.shape[-1]} classes but the "
+            f"served model scores {_OUT.shape[-1]}"
+        )
+
+
+def _load_cascade() -> Optional[_Cascade]:
+    # Written by calibrate_cascade.py; PACER_CASCADE=0 turns it off
+    if os.environ.get("PACER_CASCADE", "1") == "0" or not CASCADE_CONFIG.exists():
+        return None
+    config = json.loads(CASCADE_CONFIG.read_text())
+    stage1_path = MODEL_DIR / config["stage1_model"]
+    stage1 = load_backend(backend_name_for(stage1_path), stage1_path)
+    _check_classes(stage1, stage1_path)
+    return _Cascade(
+        stage1,
+        min_score=config["min_score"],
+        min_margin=config["min_margin"],
+    )
+
+
+_CASCADE = _load_cascade()
+
+
+class _Ensemble:
+    """Several models scored concurrently on the same pixels, then combined."""
+
+    METHODS = ("mean", "geometric")
+
+    def __init__(
+        self,
+        members: list[InferenceBackend],
+        weights: list[float],
+        method: str = "mean",
+        names: Optional[list[str]] = None,
+    ) -> None:
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown ensemble method {method!r}")
+        sizes = {m.image_size for m in members}
+        if len(sizes) != 1:
+            raise ValueError(f"Ensemble members need one input size, got {sizes}")
+        classes = {m.output.shape[-1] for m in members}
+        if len(classes) != 1:
+            raise ValueError(f"Ensemble members disagree on classes: {classes}")
+        self.members = members
+        self.names = names or [m.name for m in members]
+        self.method = method
+        self.image_size = sizes.pop()
+        w = np.asarray(weights, np.float32)
+        if w.shape != (len(members),) or not (w > 0).all():
+            raise ValueError(
+                f"Ensemble needs one positive weight per member, got {weights}"
+            )
+        self.weights = w / w.sum()
+        # The calling thread scores the first member, the pool the rest
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(len(members) - 1, 1), thread_name_prefix="ensemble"
+        )
+
+    def info(self) -> dict:
+        return {
+            "members": dict(zip(self.names, self.weights.tolist())),
+            "method": self.method,
+        }
+
+    def _run_member(self, k: int, pixels: np.ndarray, out: np.ndarray) -> None:
+        backend = self.members[k]
+        scratch, _ = _scratch(backend)
+        backend.invoke_with(
+            1,
+            lambda x: _write_input(pixels, x[0], backend.input, scratch),
+            lambda y: _read_output(y[0], backend.output, out[k]),
+        )
+
+    def run(self, img: Image.Image) -> np.ndarray:
+        pixels = _to_pixels(img, self.image_size)
+        scores = np.empty((len(self.members), self.members[0].output.shape[-1]), np.float32)
+        futures = [
+            self._pool.submit(self._run_member, k, pixels, scores)
+            for k in range(1, len(self.members))
+        ]
+        self._run_member(0, pixels, scores)
+        for f in futures:
+            f.result()
+
+        if self.method == "mean":
+            return self.weights @ scores
+        # Weighted geometric mean, renormalised to a distribution
+        log_p = self.weights @ np.log(np.maximum(scores, 1e-7))
+        p = np.exp(log_p - log_p.max())
+        return p / p.sum()
+
+
+ENSEMBLE_CONFIG = MODEL_DIR / "ensemble.json"
+
+
+def _load_ensemble() -> Optional[_Ensemble]:
+    # {"members": [{"model": "...tflite", "weight": 1.0}, ...], "method": "mean"};
+    # PACER_ENSEMBLE=0 turns it off
+    if os.environ.get("PACER_ENSEMBLE", "1") == "0" or not ENSEMBLE_CONFIG.exists():
+        return None
+    config = json.loads(ENSEMBLE_CONFIG.read_text())
+    paths = [MODEL_DIR / m["model"] for m in config["members"]]
+    members = [load_backend(backend_name_for(p), p) for p in paths]
+    for member, path in zip(members, paths):
+        _check_classes(member, path)
+    return _Ensemble(
+        members,
+        weights=[m.get("weight", 1.0) for m in config["members"]],
+        method=config.get("method", "mean"),
+        names=[p.name for p in paths],
+    )
+
+
+_ENSEMBLE = _load_ensemble()
+
+
+# ---- Batched and background paths (saliency, tiles, jobs): their own
+# interpreter, so they neither block nor resize the one serving /classify ----
+_BATCH_BACKEND: Optional[InferenceBackend] = None
+_BATCH_LOCK = threading.Lock()
+
+
+def _batch_backend() -> InferenceBackend:
+    global _BATCH_BACKEND
+    with _BATCH_LOCK:
+        if _BATCH_BACKEND is None:
+            name = os.environ.get("PACER_BACKEND", "litert")
+            _BATCH_BACKEND = load_backend(name, find_model(BACKENDS[name].suffix))
+        return _BATCH_BACKEND
+
+
+def _score_batched(
+    backend: InferenceBackend, count: int, batch_size: int, fill
+) -> np.ndarray:
+    """Scores for ``count`` items; ``fill(start, stop, x)`` writes items
+    [start, stop) into the first rows of the input tensor view ``x``.
+
+    Batches are equal-sized so the input shape (and arena) stays stable; rows
+    past the last item are left as they are and their scores dropped.
+    """
+    n_batches = -(-count // batch_size)
+    size = -(-count // n_batches)
+    scores = np.empty((n_batches * size, backend.output.shape[-1]), np.float32)
+    for b in range(n_batches):
+        start, stop = b * size, min((b + 1) * size, count)
+        out = scores[b * size : (b + 1) * size]
+        backend.invoke_with(
+            size,
+            lambda x: fill(start, stop, x),
+            lambda y: _read_output(y, backend.output, out),
+        )
+    return scores[:count]
+
+
+class _Saliency:
+    """Occlusion sensitivity maps, scored in batches and cached by image digest."""
+
+    def __init__(self, batch_size: int, cache_size: int) -> None:
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, tuple[int, float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _occluded(
+        self, pixels: np.ndarray, grid: int, idx: np.ndarray, out: np.ndarray
+    ) -> None:
+        # Patch k = (k // grid, k % grid) filled with the mean colour; k = -1
+        # leaves the image intact
+        h, w = pixels.shape[:2]
+        rows = np.arange(h) * grid // h
+        cols = np.arange(w) * grid // w
+        mask = (rows[None, :, None] == (idx // grid)[:, None, None]) & (
+            cols[None, None, :] == (idx % grid)[:, None, None]
+        )
+        fill = pixels.mean(axis=(0, 1)).round().astype(np.uint8)
+        np.copyto(out, pixels)
+        np.copyto(out, fill, where=mask[..., None])
+
+    def compute(
+        self, pixels: np.ndarray, grid: int, batch_size: int
+    ) -> tuple[int, float, np.ndarray]:
+        backend = _batch_backend()
+        variants = np.arange(-1, grid * grid)
+        # _score_batched never fills more rows than there are variants
+        rows = min(batch_size, len(variants))
+        occluded = np.empty((rows, *pixels.shape), np.uint8)
+        scratch = np.empty((rows, *backend.input.shape[1:]), np.float32)
+
+        def fill(start, stop, x):
+            n = stop - start
+            self._occluded(pixels, grid, variants[start:stop], occluded[:n])
+            _write_input(occluded[:n], x[:n], backend.input, scratch[:n])
+
+        scores = _score_batched(backend, len(variants), batch_size, fill)
+        class_id = int(scores[0].argmax())
+        base = float(scores[0, class_id])
+        drop = base - scores[1:, class_id]
+        return class_id, base, drop.reshape(grid, grid)
+
+    def get(
+        self, img_bytes: bytes, grid: int, batch_size: Optional[int] = None
+    ) -> tuple[int, float, np.ndarray]:
+        key = (hashlib.sha256(img_bytes).digest(), grid)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        size = _batch_backend().image_size
+        result = self.compute(
+            _to_pixels(_load_rgb(img_bytes, size), size),
+            grid,
+            batch_size or self.batch_size,
+        )
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+SALIENCY_GRID = int(os.environ.get("PACER_SALIENCY_GRID", 8))
+# 16x16 is 257 images; finer grids hold a saliency slot for many seconds
+MAX_SALIENCY_GRID = 16
+MAX_SALIENCY_BATCH = 64
+
+_SALIENCY = _Saliency(
+    batch_size=int(os.environ.get("PACER_SALIENCY_BATCH", 32)),
+    cache_size=int(os.environ.get("PACER_SALIENCY_CACHE", 128)),
+)
+
+
+def _load_canvas(img_bytes: bytes, side: int) -> Image.Image:
+    # One decode near the largest canvas needed; JPEGs scale down in the DCT
+    img = _load_image(img_bytes, (side, side))
+    if img.format == "JPEG":
+        img.draft("RGB", (side, side))
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img
+
+
+class _Tiler:
+    """Overlapping model-sized tiles cut at several zoom levels of one decode."""
+
+    def __init__(
+        self, zooms: list[float], overlap: float, budget: int, batch_size: int
+    ) -> None:
+        if not 0 <= overlap < 1:
+            raise ValueError("Tile overlap must be in [0, 1)")
+        if budget < 1:
+            raise ValueError("Tile budget must be at least 1")
+        # Zoom 1 is the whole image as a single tile; coarse levels first
+        self.zooms = sorted(zooms)
+        self.overlap = overlap
+        self.budget = budget
+        self.batch_size = batch_size
+
+    def layout(self, tile: int) -> list[tuple[int, np.ndarray]]:
+        """(canvas side, tile offsets along each axis) per zoom, within budget."""
+        plan, remaining = [], self.budget
+        for zoom in self.zooms:
+            side = max(round(tile * zoom), tile)
+            n = math.ceil((side - tile) / (tile * (1 - self.overlap))) + 1
+            # Finer levels get sparser (less overlap) when the budget runs low
+            n = min(n, math.isqrt(remaining))
+            if n < 1:
+                break
+            if n == 1:
+                offsets = np.array([(side - tile) // 2])
+            else:
+                offsets = np.linspace(0, side - tile, n).round().astype(int)
+            plan.append((side, offsets))
+            remaining -= n * n
+        return plan
+
+    def run(
+        self, img_bytes: bytes, backend: InferenceBackend, aggregate: str
+    ) -> tuple[np.ndarray, list[TileRegion]]:
+        """Aggregated scores and, per class, the region of its best tile."""
+        tile = backend.image_size[1]
+        plan = self.layout(tile)
+        img = _load_canvas(img_bytes, max(side for side, _ in plan))
+
+        views, regions = [], []
+        for side, offsets in plan:
+            canvas = np.asarray(img.resize((side, side)))
+            # [side-tile+1, side-tile+1, 1, tile, tile, 3] strided view, no copy
+            windows = np.lib.stride_tricks.sliding_window_view(
+                canvas, (tile, tile, 3)
+            )
+            for oy in offsets.tolist():
+                for ox in offsets.tolist():
+                    views.append(windows[oy, ox, 0])
+                    regions.append(
+                        TileRegion(
+                            x=ox / side, y=oy / side, width=tile / side, height=tile / side
+                        )
+                    )
+
+        scratch = np.empty(backend.input.shape[1:], np.float32)
+
+        def fill(start, stop, x):
+            # Each strided tile is converted straight into its tensor row
+            for i in range(start, stop):
+                _write_input(views[i], x[i - start], backend.input, scratch)
+
+        scores = _score_batched(backend, len(views), self.batch_size, fill)
+        best = scores.argmax(axis=0)
+        combined = scores.max(axis=0) if aggregate == "max" else scores.mean(axis=0)
+        return combined, [regions[i] for i in best]
+
+
+TILE_AGGREGATES = ("max", "mean")
+_TILE_AGGREGATE = os.environ.get("PACER_TILE_AGGREGATE", "max")
+
+_TILER = _Tiler(
+    zooms=[float(z) for z in os.environ.get("PACER_TILE_ZOOMS", "1,2,4").split(",")],
+    overlap=float(os.environ.get("PACER_TILE_OVERLAP", 0.5)),
+    budget=int(os.environ.get("PACER_TILE_BUDGET", 32)),
+    batch_size=int(os.environ.get("PACER_TILE_BATCH", 32)),
+)
+
+SERVED_BY_STAGE1 = "stage1"
+SERVED_BY_ENSEMBLE = "ensemble"
 
 
 class PacemakerClassifier:
-    """Classifier using a pre-loaded TFLite interpreter."""
+    """Classifier using pre-loaded inference backends, one per input resolution."""
 
     @classmethod
-    def classify(
-        cls, img_bytes: bytes, threshold: float = 0.01
+    def variants(cls) -> List[str]:
+        return list(_VARIANTS)
+
+    @classmethod
+    def cascade_stats(cls) -> Optional[dict]:
+        return _CASCADE.stats() if _CASCADE is not None else None
+
+    @classmethod
+    def ensemble_info(cls) -> Optional[dict]:
+        return _ENSEMBLE.info() if _ENSEMBLE is not None else None
+
+    @classmethod
+    def select_variant(
+        cls, queue_depth: int = 0, quality: Optional[str] = None
+    ) -> str:
+        """Pick a resolution variant from a quality hint or the current load.
+
+        ``quality`` may be a variant name (e.g. ``"r192"``) or one of
+        ``QUALITY_HINTS``; without it, deeper queues get smaller inputs.
+        """
+        names = list(_VARIANTS)
+        if quality is None:
+            level = queue_depth // _DEGRADE_STEP
+        elif quality in _VARIANTS:
+            return quality
+        elif quality == "high":
+            level = 0
+        elif quality == "balanced":
+            level = len(names) // 2
+        elif quality == "fast":
+            level = len(names) - 1
+        else:
+            raise ValueError(
+                f"Unknown quality {quality!r}, expected one of "
+                f"{[*QUALITY_HINTS, *names]}"
+            )
+        return names[min(level, len(names) - 1)]
+
+    @classmethod
+    def saliency(
+        cls,
+        img_bytes: bytes,
+        grid: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> tuple[int, float, np.ndarray]:
+        """Occlusion map for the top class: (class_id, score, [grid, grid] drops).
+
+        Each cell is how much the top score falls when that patch is hidden.
+        """
+        grid = grid or SALIENCY_GRID
+        if not 2 <= grid <= MAX_SALIENCY_GRID:
+            raise ValueError(f"grid must be between 2 and {MAX_SALIENCY_GRID}")
+        if batch_size is not None and not 1 <= batch_size <= MAX_SALIENCY_BATCH:
+            raise ValueError(f"batch_size must be between 1 and {MAX_SALIENCY_BATCH}")
+        return _SALIENCY.get(img_bytes, grid, batch_size)
+
+    @classmethod
+    def classify_tiled(
+        cls,
+        img_bytes: bytes,
+        threshold: float = 0.01,
+        aggregate: Optional[str] = None,
     ) -> List[ClassScore]:
-        # Load & preprocess image
-        img = Image.open(io.BytesIO(img_bytes))
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-        img = img.resize((224, 224))
+        """Full model over multi-scale tiles, for devices too small at 224 px.
 
-        x = np.asarray(img, dtype=np.float32)  # [H,W,C], 0..255
-        x = _mobilenet_v2_preprocess(x)  # [-1,1]
-        x = np.expand_dims(x, 0)  # [1,224,224,3]
+        Scores are aggregated per class across tiles (``"max"`` or ``"mean"``);
+        each result carries the region of the tile that scored it highest.
+        """
+        aggregate = aggregate or _TILE_AGGREGATE
+        if aggregate not in TILE_AGGREGATES:
+            raise ValueError(
+                f"Unknown aggregate {aggregate!r}, expected one of {TILE_AGGREGATES}"
+            )
+        preds, regions = _TILER.run(img_bytes, _batch_backend(), aggregate)
+
+        results = [
+            ClassScore(class_id=int(i), score=float(s), region=regions[i])
+            for i, s in enumerate(preds)
+            if s >= threshold
+        ]
+        results.sort(key=lambda z: z.score, reverse=True)
+        return results
+
+    @classmethod
+    def classify_served(
+        cls,
+        img_bytes: bytes,
+        threshold: float = 0.01,
+        variant: Optional[str] = None,
+    ) -> tuple[List[ClassScore], str]:
+        """Like ``classify``, plus what produced the scores: ``"stage1"`` (the
+        cascade's cheap model), ``"ensemble"`` or the variant name."""
+        variant = variant or next(iter(_VARIANTS))
+        backend = _VARIANTS[variant]
 
-        x_in = _quantize_if_needed(x)
+        # Load image
+        img = _load_rgb(img_bytes, backend.image_size)
 
-        # Inference
-        _INTERP.set_tensor(_IN_IDX, x_in)
-        _INTERP.invoke()
-        y = _INTERP.get_tensor(_OUT_IDX)[0]
+        # Inference: cheap model first when a cascade is configured
+        served_by = SERVED_BY_STAGE1
+        preds = _CASCADE.run(img) if _CASCADE is not None else None
+        if preds is None and _ENSEMBLE is not None and backend is _BACKEND:
+            # Full quality only; degraded variants stay single-model
+            served_by = SERVED_BY_ENSEMBLE
+            preds = _ENSEMBLE.run(img)
+        if preds is None:
+            served_by = variant
+            pixels = _to_pixels(img, backend.image_size)
+            preds = _score_pixels(backend, pixels)  # float32 scores
 
         # Postprocess
-        preds = _dequantize_if_needed(y)  # float32 scores
+        results = [
+            ClassScore(class_id=int(i), score=float(s))
+            for i, s in enumerate(preds)
+            if s >= threshold
+        ]
+        results.sort(key=lambda z: z.score, reverse=True)
+        return results, served_by
+
+    @classmethod
+    def classify_background(
+        cls, img_bytes: bytes, threshold: float = 0.01
+    ) -> List[ClassScore]:
+        """Full model on the background interpreter, for queued batch work."""
+        backend = _batch_backend()
+        pixels = _to_pixels(_load_rgb(img_bytes, backend.image_size), backend.image_size)
+        preds = _score_pixels(backend, pixels)
+
         results = [
             ClassScore(class_id=int(i), score=float(s))
             for i, s in enumerate(preds)
@@ -107,3 +684,12 @@ class PacemakerClassifier:
         ]
         results.sort(key=lambda z: z.score, reverse=True)
         return results
+
+    @classmethod
+    def classify(
+        cls,
+        img_bytes: bytes,
+        threshold: float = 0.01,
+        variant: Optional[str] = None,
+    ) -> List[ClassScore]:
+        return cls.classify_served(img_bytes, threshold, variant)[0]
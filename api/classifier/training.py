@@ -1,8 +1,12 @@
 import argparse
 import datetime
 import json
+import re
+import time
 from pathlib import Path
 
+import numpy as np
+
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
@@ -35,6 +39,36 @@ def parse_arguments():
         default=0.0005,
         help="Initial learning rate",
     )
+    parser.add_argument(
+        "--img-size",
+        type=int,
+        default=224,
+        help="Square input resolution to train at (e.g. 160, 192, 224)",
+    )
+    parser.add_argument(
+        "--distill-from",
+        type=str,
+        default=None,
+        help="Path to a trained .keras teacher; trains a compact student instead",
+    )
+    parser.add_argument(
+        "--student-alpha",
+        type=float,
+        default=0.35,
+        help="MobileNetV2 width multiplier for the distilled student",
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=4.0,
+        help="Softmax temperature for the teacher's soft targets",
+    )
+    parser.add_argument(
+        "--distill-weight",
+        type=float,
+        default=0.7,
+        help="Weight of the soft-target loss vs. the hard-label loss",
+    )
     return parser.parse_args()
 
 
@@ -90,11 +124,12 @@ def load_data(data_dir, batch_size=16, img_size=(224, 224)):
     return train_ds, val_ds, class_names, num_classes
 
 
-def create_model(num_classes, input_shape=(224, 224, 3)):
+def create_model(num_classes, input_shape=(224, 224, 3), alpha=1.0):
     """Create a simple transfer learning model using MobileNetV2."""
-    # Load pre-trained MobileNetV2
+    # Load pre-trained MobileNetV2 (alpha < 1.0 gives a narrower network)
     base_model = keras.applications.MobileNetV2(
         input_shape=input_shape,
+        alpha=alpha,
         include_top=False,
         weights="imagenet",
         pooling="avg",
@@ -245,14 +280,201 @@ def fine_tune_model(
     return history_ft
 
 
+def _resize_for(model, x):
+    """Resize ``x`` to ``model``'s fixed input size when the two differ."""
+    size = tuple(model.input_shape[1:3])
+    if None in size or tuple(x.shape[1:3]) == size:
+        return x
+    return tf.image.resize(x, size)
+
+
+def _soften(probs, temperature):
+    """Re-apply softmax at a temperature, recovering logits from probabilities."""
+    logits = tf.math.log(tf.clip_by_value(probs, 1e-7, 1.0))
+    return tf.nn.softmax(logits / temperature, axis=-1)
+
+
+class Distiller(keras.Model):
+    """Trains ``student`` on a blend of hard labels and the teacher's soft targets."""
+
+    def __init__(self, student, teacher, temperature=4.0, distill_weight=0.7):
+        super().__init__()
+        self.student = student
+        self.teacher = teacher
+        self.teacher.trainable = False
+        self.temperature = temperature
+        self.distill_weight = distill_weight
+
+    def call(self, x, training=False):
+        return self.student(x, training=training)
+
+    def compute_loss(
+        self, x=None, y=None, y_pred=None, sample_weight=None, training=True
+    ):
+        teacher_pred = self.teacher(_resize_for(self.teacher, x), training=False)
+        hard_loss = keras.losses.categorical_crossentropy(y, y_pred)
+        soft_loss = keras.losses.kullback_leibler_divergence(
+            _soften(teacher_pred, self.temperature),
+            _soften(y_pred, self.temperature),
+        )
+        # T^2 keeps soft-target gradients on the same scale as the hard loss
+        loss = (
+            self.distill_weight * soft_loss * self.temperature**2
+            + (1.0 - self.distill_weight) * hard_loss
+        )
+        return tf.reduce_mean(loss)
+
+
+# Training run timestamp shared by a run's model and classes_*.json
+_TIMESTAMP_RE = re.compile(r"(\d{8}_\d{6})")
+
+
+def check_teacher_classes(teacher_path, class_names):
+    """Make sure the student uses the teacher's class indices (and CLASS_DB)."""
+    teacher_path = Path(teacher_path)
+    # e.g. final_model_20250903_225035 -> classes_20250903_225035.json
+    match = _TIMESTAMP_RE.search(teacher_path.stem)
+    if not match:
+        print(f"Warning: no timestamp in {teacher_path.name}, skipping class check")
+        return
+    class_path = teacher_path.parent / f"classes_{match.group(1)}.json"
+    if not class_path.exists():
+        print(f"Warning: no class mapping found at {class_path}, skipping check")
+        return
+    with open(class_path) as f:
+        teacher_classes = json.load(f)["classes"]
+    if teacher_classes != list(class_names):
+        raise ValueError(
+            f"Dataset classes do not match the teacher's mapping in {class_path}"
+        )
+
+
+def distill_model(
+    distiller, base_model, train_ds, val_ds, epochs, learning_rate, output_dir
+):
+    """Distill in two phases: frozen student backbone, then top layers unfrozen."""
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    histories = []
+    phases = [
+        ("distill", learning_rate, epochs, None),
+        ("distill_finetuned", 1e-5, epochs // 3, 30),
+    ]
+    for phase, lr, phase_epochs, unfrozen in phases:
+        if unfrozen is not None:
+            base_model.trainable = True
+            for layer in base_model.layers[:-unfrozen]:
+                layer.trainable = False
+
+        distiller.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=lr),
+            metrics=["accuracy"],
+        )
+        print(f"\nStarting {phase} phase...")
+        histories.append(
+            distiller.fit(
+                train_ds,
+                validation_data=val_ds,
+                epochs=phase_epochs,
+                callbacks=[
+                    keras.callbacks.EarlyStopping(
+                        monitor="val_accuracy",
+                        patience=5,
+                        restore_best_weights=True,
+                        verbose=1,
+                    ),
+                    keras.callbacks.CSVLogger(
+                        output_path / f"{phase}_log_{timestamp}.csv"
+                    ),
+                ],
+                verbose=1,
+            )
+        )
+
+    return histories[0], histories[1], timestamp
+
+
+def _tflite_latency_ms(model, runs=50):
+    """Convert like convert_to_tflite.py and time single-image invokes."""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    tflite_model = converter.convert()
+
+    interp = tf.lite.Interpreter(model_content=tflite_model)
+    interp.allocate_tensors()
+    in_d = interp.get_input_details()[0]
+    x = np.random.uniform(0, 255, in_d["shape"]).astype(np.float32)
+
+    interp.set_tensor(in_d["index"], x)
+    interp.invoke()  # warm up
+    start = time.perf_counter()
+    for _ in range(runs):
+        interp.set_tensor(in_d["index"], x)
+        interp.invoke()
+    return (time.perf_counter() - start) * 1e3 / runs, len(tflite_model)
+
+
+def compare_models(teacher, student, val_ds, output_dir, timestamp):
+    """Report accuracy gap, TFLite size and latency of student vs teacher."""
+    report = {}
+    for name, model in (("teacher", teacher), ("student", student)):
+        model.compile(loss="categorical_crossentropy", metrics=["accuracy"])
+        # The teacher keeps its own input size when --img-size differs
+        ds = val_ds.map(lambda x, y: (_resize_for(model, x), y))
+        _, accuracy = model.evaluate(ds, verbose=0)
+        latency_ms, size = _tflite_latency_ms(model)
+        report[name] = {
+            "params": int(model.count_params()),
+            "val_accuracy": float(accuracy),
+            "tflite_bytes": size,
+            "tflite_latency_ms": latency_ms,
+        }
+    report["accuracy_gap"] = (
+        report["teacher"]["val_accuracy"] - report["student"]["val_accuracy"]
+    )
+    report["size_ratio"] = (
+        report["student"]["tflite_bytes"] / report["teacher"]["tflite_bytes"]
+    )
+    report["speedup"] = (
+        report["teacher"]["tflite_latency_ms"]
+        / report["student"]["tflite_latency_ms"]
+    )
+
+    report_path = Path(output_dir) / f"distill_report_{timestamp}.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'':<10}{'params':>12}{'val acc':>10}{'MB':>8}{'ms':>8}")
+    for name in ("teacher", "student"):
+        r = report[name]
+        print(
+            f"{name:<10}{r['params']:>12,}{r['val_accuracy']:>10.4f}"
+            f"{r['tflite_bytes'] / 1e6:>8.2f}{r['tflite_latency_ms']:>8.2f}"
+        )
+    print(
+        f"Accuracy gap: {report['accuracy_gap']:.4f}, "
+        f"size ratio: {report['size_ratio']:.2f}, speedup: {report['speedup']:.2f}x"
+    )
+    print(f"Distillation report saved to: {report_path}")
+    return report
+
+
 def save_results(
-    model, class_names, history, history_ft, output_dir, timestamp
+    model,
+    class_names,
+    history,
+    history_ft,
+    output_dir,
+    timestamp,
+    model_name="final_model",
 ):
     """Save final model and training results."""
     output_path = Path(output_dir)
 
     # Save final model
-    final_path = output_path / f"final_model_{timestamp}.keras"
+    final_path = output_path / f"{model_name}_{timestamp}.keras"
     model.save(final_path)
     print(f"\nFinal model saved to: {final_path}")
 
@@ -285,12 +507,78 @@ def save_results(
         f.write(f"Timestamp: {timestamp}\n")
         f.write(f"Number of classes: {len(class_names)}\n")
         f.write(f"Best validation accuracy: {best_accuracy:.4f}\n")
-        f.write(f"Final model: final_model_{timestamp}.keras\n")
+        f.write(f"Final model: {model_name}_{timestamp}.keras\n")
     print(f"Summary saved to: {summary_path}")
 
     return best_accuracy
 
 
+def distill(args):
+    """Distillation pipeline: train a compact student from a trained teacher."""
+    print("\n1. Loading data...")
+    train_ds, val_ds, class_names, num_classes = load_data(
+        args.input,
+        batch_size=args.batch_size,
+        img_size=(args.img_size, args.img_size),
+    )
+    check_teacher_classes(args.distill_from, class_names)
+
+    print("\n2. Adding data augmentation...")
+    train_ds = add_augmentation(train_ds)
+
+    print("\n3. Loading teacher and creating student...")
+    teacher = keras.models.load_model(args.distill_from)
+    student, base_model = create_model(
+        num_classes,
+        input_shape=(args.img_size, args.img_size, 3),
+        alpha=args.student_alpha,
+    )
+    print(
+        f"Teacher: {teacher.count_params():,} parameters, "
+        f"student: {student.count_params():,} parameters"
+    )
+    distiller = Distiller(
+        student,
+        teacher,
+        temperature=args.temperature,
+        distill_weight=args.distill_weight,
+    )
+
+    print("\n4. Distilling...")
+    history, history_ft, timestamp = distill_model(
+        distiller,
+        base_model,
+        train_ds,
+        val_ds,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        output_dir=args.output,
+    )
+
+    print("\n5. Saving results...")
+    best_accuracy = save_results(
+        student,
+        class_names,
+        history,
+        history_ft,
+        output_dir=args.output,
+        timestamp=timestamp,
+        model_name="student_model",
+    )
+
+    print("\n6. Comparing student with teacher...")
+    compare_models(teacher, student, val_ds, args.output, timestamp)
+
+    print("\n" + "=" * 50)
+    print("Distillation Complete!")
+    print(f"Best validation accuracy: {best_accuracy:.2%}")
+    print(
+        "Export with: python api/classifier/convert_to_tflite.py "
+        f"--model {Path(args.output) / f'student_model_{timestamp}.keras'}"
+    )
+    print("=" * 50)
+
+
 def main():
     """Main training pipeline."""
     # Parse arguments
@@ -317,12 +605,22 @@ def main():
     print(f"Epochs: {args.epochs}")
     print(f"Batch size: {args.batch_size}")
     print(f"Learning rate: {args.learning_rate}")
+    print(f"Image size: {args.img_size}")
+    if args.distill_from:
+        print(f"Distilling from: {args.distill_from}")
+        print(f"Student alpha: {args.student_alpha}")
     print("=" * 50)
 
+    if args.distill_from:
+        distill(args)
+        return
+
     # Load data
     print("\n1. Loading data...")
     train_ds, val_ds, class_names, num_classes = load_data(
-        args.input, batch_size=args.batch_size
+        args.input,
+        batch_size=args.batch_size,
+        img_size=(args.img_size, args.img_size),
     )
 
     # Add augmentation
@@ -331,7 +629,9 @@ def main():
 
     # Create model
     print("\n3. Creating model...")
-    model, base_model = create_model(num_classes)
+    model, base_model = create_model(
+        num_classes, input_shape=(args.img_size, args.img_size, 3)
+    )
     print(f"Model created with {model.count_params():,} parameters")
 
     # Initial training
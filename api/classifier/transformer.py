@@ -372,6 +372,7 @@ def serialize_medical_devices(
                 description=meta.description,
                 image=meta.image,
                 leads=meta.leads,
+                region=result.region,
             )
         )
 
@@ -1,15 +1,44 @@
+import os
 from dataclasses import dataclass
-from typing import Annotated
+from typing import Annotated, Optional
 
-from litestar import Litestar, Router, get, post
+import numpy as np
+from anyio import to_thread
+from litestar import Litestar, Request, Response, Router, get, post
 from litestar.config.cors import CORSConfig
 from litestar.datastructures import UploadFile
 from litestar.enums import RequestEncodingType
+from litestar.exceptions import NotFoundException, ValidationException
 from litestar.params import Body
+from litestar.status_codes import HTTP_202_ACCEPTED
 
-from api.classifier.service import PacemakerClassifier
-from api.classifier.transformer import serialize_medical_devices
-from api.types import MedicalDeviceResult
+from api.admission import (
+    ADMISSION,
+    SALIENCY_ADMISSION,
+    admission_guard,
+    client_key,
+    request_deadline,
+)
+from api.classifier.service import TILE_AGGREGATES, PacemakerClassifier
+from api.classifier.transformer import (
+    CLASS_DB,
+    DEFAULT_META,
+    serialize_medical_devices,
+)
+from api.jobs import JOBS
+from api.types import (
+    JobResult,
+    JobStatus,
+    JobSubmission,
+    MedicalDeviceResult,
+    SaliencyMap,
+)
+
+VARIANT_HEADER = "X-Model-Variant"
+MAX_JOB_IMAGES = 256
+MAX_JOB_BYTES = 512 * 1024 * 1024
+# Single-image routes take uncompressed DICOM films, far above the 10 MB default
+MAX_IMAGE_BYTES = int(os.environ.get("PACER_MAX_IMAGE_BYTES", 64 * 1024 * 1024))
 
 
 @dataclass
@@ -17,13 +46,130 @@ class ImageForm:
     image: UploadFile
 
 
-@post("/classify")
+@dataclass
+class JobForm:
+    images: list[UploadFile]
+
+
+@post(
+    "/classify",
+    request_max_body_size=MAX_IMAGE_BYTES,
+    guards=[admission_guard(ADMISSION)],
+)
 async def classify_medical_device(
+    request: Request,
+    data: Annotated[ImageForm, Body(media_type=RequestEncodingType.MULTI_PART)],
+    quality: Optional[str] = None,
+    tiled: bool = False,
+    aggregate: Optional[str] = None,
+) -> Response[list[MedicalDeviceResult]]:
+    if aggregate is not None and aggregate not in TILE_AGGREGATES:
+        raise ValidationException(
+            detail=f"Unknown aggregate {aggregate!r}, expected one of {TILE_AGGREGATES}"
+        )
+    try:
+        # Decided on arrival: a deep queue means a smaller, faster input size;
+        # tiled mode always runs the full model
+        variant = (
+            PacemakerClassifier.variants()[0]
+            if tiled
+            else PacemakerClassifier.select_variant(ADMISSION.queue_depth, quality)
+        )
+    except ValueError as e:
+        raise ValidationException(detail=str(e)) from None
+
+    img_bytes = await data.image.read()
+    async with ADMISSION.admit(client_key(request), request_deadline(request)):
+        # Run off the event loop so queued requests can still be shed
+        if tiled:
+            results = await to_thread.run_sync(
+                PacemakerClassifier.classify_tiled, img_bytes, 0.01, aggregate
+            )
+        else:
+            # Report what actually answered: the cascade, ensemble or variant
+            results, variant = await to_thread.run_sync(
+                PacemakerClassifier.classify_served, img_bytes, 0.01, variant
+            )
+    return Response(
+        serialize_medical_devices(results), headers={VARIANT_HEADER: variant}
+    )
+
+
+@post(
+    "/saliency",
+    request_max_body_size=MAX_IMAGE_BYTES,
+    guards=[admission_guard(SALIENCY_ADMISSION)],
+)
+async def saliency_map(
+    request: Request,
     data: Annotated[ImageForm, Body(media_type=RequestEncodingType.MULTI_PART)],
-) -> list[MedicalDeviceResult]:
+    grid: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> SaliencyMap:
     img_bytes = await data.image.read()
-    results = PacemakerClassifier.classify(img_bytes)
-    return serialize_medical_devices(results)
+    async with SALIENCY_ADMISSION.admit(
+        client_key(request), request_deadline(request)
+    ):
+        try:
+            class_id, score, drop = await to_thread.run_sync(
+                PacemakerClassifier.saliency, img_bytes, grid, batch_size
+            )
+        except ValueError as e:
+            raise ValidationException(detail=str(e)) from None
+
+    max_drop = float(drop.max())
+    heatmap = np.clip(drop / max_drop, 0.0, 1.0) if max_drop > 0 else np.zeros_like(drop)
+    return SaliencyMap(
+        name=CLASS_DB.get(class_id, DEFAULT_META).name,
+        confidence=score,
+        heatmap=heatmap.round(4).tolist(),
+        max_drop=max_drop,
+    )
+
+
+@post(
+    "/jobs",
+    status_code=HTTP_202_ACCEPTED,
+    request_max_body_size=MAX_JOB_BYTES,
+)
+async def submit_job(
+    data: Annotated[JobForm, Body(media_type=RequestEncodingType.MULTI_PART)],
+) -> JobSubmission:
+    if not data.images:
+        raise ValidationException(detail="No images submitted")
+    if len(data.images) > MAX_JOB_IMAGES:
+        raise ValidationException(
+            detail=f"At most {MAX_JOB_IMAGES} images per job"
+        )
+    images = [await image.read() for image in data.images]
+    job_id = await to_thread.run_sync(JOBS.submit, images)
+    return JobSubmission(
+        job_id=job_id, status=JobStatus.QUEUED, images=len(images)
+    )
+
+
+@get("/jobs/{job_id:str}")
+async def get_job(job_id: str) -> JobResult:
+    job = await to_thread.run_sync(JOBS.get, job_id)
+    if job is None:
+        raise NotFoundException(detail=f"Job {job_id} not found")
+    return job
+
+
+@get("/metrics", tags=["system"])
+async def metrics() -> dict:
+    return {
+        "admission": {
+            "queue_depth": ADMISSION.queue_depth,
+            "in_flight": ADMISSION.in_flight,
+        },
+        "saliency_admission": {
+            "queue_depth": SALIENCY_ADMISSION.queue_depth,
+            "in_flight": SALIENCY_ADMISSION.in_flight,
+        },
+        "cascade": PacemakerClassifier.cascade_stats(),
+        "ensemble": PacemakerClassifier.ensemble_info(),
+    }
 
 
 @get("/", tags=["system"])
@@ -33,8 +179,18 @@ async def health_check() -> dict:
 
 api = Router(
     path="/api",
-    route_handlers=[classify_medical_device, health_check],
+    route_handlers=[
+        classify_medical_device,
+        saliency_map,
+        submit_job,
+        get_job,
+        metrics,
+        health_check,
+    ],
 )
 app = Litestar(
-    route_handlers=[api], cors_config=CORSConfig(allow_origins=["*"])
+    route_handlers=[api],
+    cors_config=CORSConfig(allow_origins=["*"], expose_headers=[VARIANT_HEADER]),
+    on_startup=[JOBS.start],
+    on_shutdown=[JOBS.stop],
 )
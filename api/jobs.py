@@ -0,0 +1,272 @@
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Optional
+
+import msgspec
+
+from api.admission import ADMISSION, AdmissionController
+from api.classifier.service import PacemakerClassifier
+from api.classifier.transformer import serialize_medical_devices
+from api.types import JobItemResult, JobResult, JobStatus, MedicalDeviceResult
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    completed_at REAL,
+    heartbeat REAL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    image BLOB,
+    results BLOB,
+    error TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+_results_decoder = msgspec.json.Decoder(list[MedicalDeviceResult])
+
+# How often a worker rechecks whether live traffic has drained
+_IDLE_POLL = 0.02
+# A running job whose worker has not checked in for this long is reclaimed
+_LEASE = 60.0
+
+
+class JobQueue:
+    """SQLite-backed job queue processed by in-process worker threads.
+
+    Images are stored with the job so unfinished work survives a restart,
+    and dropped as soon as each one is scored. Finished jobs are deleted
+    after ``retention`` seconds. Several processes may share one database:
+    workers claim jobs atomically, and a running job whose worker stops
+    checking in for ``_LEASE`` seconds is picked up again.
+
+    Jobs run at lower priority than ``yield_to``: before each image a worker
+    waits up to ``max_wait`` seconds for that controller to have nothing
+    running or queued, and it scores on the background interpreter, not the
+    one serving requests.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        workers: int = 1,
+        retention: float = 3600.0,
+        yield_to: Optional[AdmissionController] = None,
+        max_wait: float = 2.0,
+    ) -> None:
+        self.workers = workers
+        self.retention = retention
+        self.yield_to = yield_to
+        self.max_wait = max_wait
+
+        self._db = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(_SCHEMA)
+        try:
+            # Databases created before leases were added
+            self._db.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+        except sqlite3.OperationalError:
+            pass
+        self._db_lock = threading.Lock()
+
+        # Wake-ups only; which job runs next is decided by _claim()
+        self._pending: queue.Queue[str] = queue.Queue()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def submit(self, images: list[bytes]) -> str:
+        job_id = uuid.uuid4().hex
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT INTO jobs (id, status, created_at) VALUES (?, ?, ?)",
+                (job_id, JobStatus.QUEUED.value, time.time()),
+            )
+            self._db.executemany(
+                "INSERT INTO job_items (job_id, idx, image) VALUES (?, ?, ?)",
+                [(job_id, i, img) for i, img in enumerate(images)],
+            )
+            self._db.execute("COMMIT")
+        self._pending.put(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[JobResult]:
+        rows = self._execute(
+            "SELECT status, created_at, completed_at FROM jobs WHERE id = ?",
+            (job_id,),
+        )
+        if not rows:
+            return None
+        status, created_at, completed_at = rows[0]
+
+        items = []
+        for idx, results, error in self._execute(
+            "SELECT idx, results, error FROM job_items "
+            "WHERE job_id = ? ORDER BY idx",
+            (job_id,),
+        ):
+            items.append(
+                JobItemResult(
+                    index=idx,
+                    results=_results_decoder.decode(results)
+                    if results is not None
+                    else None,
+                    error=error,
+                )
+            )
+        return JobResult(
+            job_id=job_id,
+            status=JobStatus(status),
+            created_at=created_at,
+            completed_at=completed_at,
+            items=items,
+        )
+
+    def cleanup(self) -> int:
+        cutoff = time.time() - self.retention
+        with self._db_lock:
+            cur = self._db.execute(
+                "DELETE FROM jobs WHERE completed_at IS NOT NULL "
+                "AND completed_at < ?",
+                (cutoff,),
+            )
+            return cur.rowcount
+
+    def _claim(self) -> Optional[str]:
+        """Oldest queued (or abandoned running) job, marked running by us."""
+        now = time.time()
+        candidates = self._execute(
+            "SELECT id FROM jobs WHERE status = ? "
+            "OR (status = ? AND heartbeat < ?) ORDER BY created_at",
+            (JobStatus.QUEUED.value, JobStatus.RUNNING.value, now - _LEASE),
+        )
+        for (job_id,) in candidates:
+            # Another worker or process may have claimed it since the SELECT
+            with self._db_lock:
+                cur = self._db.execute(
+                    "UPDATE jobs SET status = ?, heartbeat = ? WHERE id = ? "
+                    "AND (status = ? OR (status = ? AND heartbeat < ?))",
+                    (
+                        JobStatus.RUNNING.value,
+                        now,
+                        job_id,
+                        JobStatus.QUEUED.value,
+                        JobStatus.RUNNING.value,
+                        now - _LEASE,
+                    ),
+                )
+            if cur.rowcount == 1:
+                return job_id
+        return None
+
+    def start(self) -> None:
+        # Anything a previous process accepted but never finished is still
+        # queued (or running with a stale lease) and gets claimed normally
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(
+                target=self._work, name=f"pacer-job-{i}", daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join()
+        self._threads.clear()
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            job_id = self._claim()
+            if job_id is None:
+                # Also polls for jobs submitted through other processes
+                try:
+                    self._pending.get(timeout=1.0)
+                except queue.Empty:
+                    self.cleanup()
+                continue
+            try:
+                self._run(job_id)
+            except Exception:
+                self._execute(
+                    "UPDATE jobs SET status = ?, completed_at = ? WHERE id = ?",
+                    (JobStatus.FAILED.value, time.time(), job_id),
+                )
+
+    def _wait_for_idle(self) -> None:
+        # Plain int reads of the controller's counters; no lock needed. The
+        # cap keeps jobs moving under steady traffic that never fully drains
+        deadline = time.monotonic() + self.max_wait
+        while (
+            self.yield_to is not None
+            and not self._stop.is_set()
+            and time.monotonic() < deadline
+            and (self.yield_to.in_flight or self.yield_to.queue_depth)
+        ):
+            time.sleep(_IDLE_POLL)
+
+    def _run(self, job_id: str) -> None:
+        pending = self._execute(
+            "SELECT idx FROM job_items "
+            "WHERE job_id = ? AND image IS NOT NULL ORDER BY idx",
+            (job_id,),
+        )
+        for (idx,) in pending:
+            self._wait_for_idle()
+            if self._stop.is_set():
+                # Hand it back so the next start() (or another process) resumes it
+                self._execute(
+                    "UPDATE jobs SET status = ? WHERE id = ?",
+                    (JobStatus.QUEUED.value, job_id),
+                )
+                return
+            (image,) = self._execute(
+                "SELECT image FROM job_items WHERE job_id = ? AND idx = ?",
+                (job_id, idx),
+            )[0]
+            results, error = None, None
+            try:
+                scores = PacemakerClassifier.classify_background(image)
+                results = msgspec.json.encode(serialize_medical_devices(scores))
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            self._execute(
+                "UPDATE job_items SET image = NULL, results = ?, error = ? "
+                "WHERE job_id = ? AND idx = ?",
+                (results, error, job_id, idx),
+            )
+            self._execute(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time(), job_id)
+            )
+        self._execute(
+            "UPDATE jobs SET status = ?, completed_at = ? WHERE id = ?",
+            (JobStatus.DONE.value, time.time(), job_id),
+        )
+
+
+JOBS = JobQueue(
+    db_path=os.environ.get(
+        "PACER_JOB_DB", os.path.join(tempfile.gettempdir(), "pacer_jobs.sqlite3")
+    ),
+    workers=int(os.environ.get("PACER_JOB_WORKERS", 1)),
+    retention=float(os.environ.get("PACER_JOB_RETENTION", 3600)),
+    yield_to=ADMISSION,
+    max_wait=float(os.environ.get("PACER_JOB_MAX_WAIT", 2.0)),
+)
@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import numpy as np
+from PIL import Image
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Load-test /api/classify and report latency percentiles"
+    )
+    parser.add_argument(
+        "--url",
+        type=str,
+        default=None,
+        help="Target an already running server instead of launching api.index:app",
+    )
+    parser.add_argument(
+        "--env",
+        nargs="*",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Environment for the launched server, e.g. PACER_MAX_CONCURRENCY=2",
+    )
+    parser.add_argument(
+        "--concurrency",
+        nargs="*",
+        type=int,
+        default=[1, 2, 4, 8],
+        help="Closed-loop sweep: number of clients each sending back-to-back",
+    )
+    parser.add_argument(
+        "--rates",
+        nargs="*",
+        type=float,
+        default=[],
+        help="Open-loop mode: fixed arrival rates in requests per second",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=20.0, help="Seconds per configuration"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=2.0, help="Unrecorded seconds first"
+    )
+    parser.add_argument(
+        "--images", type=int, default=8, help="Synthetic images in the corpus"
+    )
+    parser.add_argument(
+        "--image-size",
+        type=int,
+        default=2500,
+        help="Side length of the synthetic films in pixels",
+    )
+    parser.add_argument(
+        "--label", type=str, default="", help="Tag stored with every result"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Append one JSON object per configuration to this file",
+    )
+    return parser.parse_args()
+
+
+def synthetic_corpus(count: int, size: int, seed: int = 0) -> list[bytes]:
+    """Chest-film-sized grayscale JPEGs: soft gradients, noise, a bright device."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    corpus = []
+    for _ in range(count):
+        film = 60 + 90 * np.exp(-((xx - 0.5) ** 2 + (yy - 0.55) ** 2) / 0.08)
+        film += rng.normal(0, 12, (size, size)).astype(np.float32)
+        # A small dense rectangle where a pacemaker can would sit
+        cy, cx = rng.uniform(0.15, 0.4), rng.uniform(0.2, 0.8)
+        h, w = int(size * 0.04), int(size * 0.06)
+        top, left = int(cy * size), int(cx * size)
+        film[top : top + h, left : left + w] = 240
+        img = Image.fromarray(np.clip(film, 0, 255).astype(np.uint8))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=90)
+        corpus.append(buf.getvalue())
+    return corpus
+
+
+class Recorder:
+    """Latencies and status codes for one configuration."""
+
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.statuses: Counter = Counter()
+        self.recording = False
+
+    def record(
+        self, status: int, latency: float, counted: Optional[bool] = None
+    ) -> None:
+        # Closed loop counts by completion window, open loop by send time
+        if not (self.recording if counted is None else counted):
+            return
+        self.statuses[status] += 1
+        if 200 <= status < 300:
+            self.latencies.append(latency)
+
+    def summary(self, elapsed: float) -> dict:
+        total = sum(self.statuses.values())
+        ok = len(self.latencies)
+        p50, p95, p99 = (
+            np.percentile(self.latencies, [50, 95, 99]) * 1e3
+            if self.latencies
+            else (float("nan"),) * 3
+        )
+        return {
+            "requests": total,
+            "throughput_rps": round(ok / elapsed, 2),
+            "latency_ms_p50": round(float(p50), 2),
+            "latency_ms_p95": round(float(p95), 2),
+            "latency_ms_p99": round(float(p99), 2),
+            "error_rate": round(1 - ok / total, 4) if total else 0.0,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+        }
+
+
+def _client_addr(i: int) -> str:
+    return f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    image: bytes,
+    recorder: Recorder,
+    sent_at: float,
+    client_addr: str,
+    counted: Optional[bool] = None,
+) -> None:
+    try:
+        r = await client.post(
+            "/api/classify",
+            files={"image": ("film.jpg", image, "image/jpeg")},
+            # Distinct clients so the per-client cap doesn't mask queue
+            # behaviour; only honoured if the server trusts us as a proxy
+            headers={"x-forwarded-for": client_addr},
+        )
+        status = r.status_code
+    except httpx.HTTPError:
+        status = 0  # connection-level failure
+    recorder.record(status, time.perf_counter() - sent_at, counted)
+
+
+async def closed_loop(
+    client: httpx.AsyncClient,
+    corpus: list[bytes],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+) -> dict:
+    """``concurrency`` clients, each sending its next request on a response."""
+    recorder = Recorder()
+    stop_at = time.perf_counter() + warmup + duration
+
+    async def worker(offset: int) -> None:
+        i = offset
+        while time.perf_counter() < stop_at:
+            await _send(
+                client,
+                corpus[i % len(corpus)],
+                recorder,
+                time.perf_counter(),
+                _client_addr(offset),
+            )
+            i += concurrency
+
+    async def recorder_window() -> float:
+        await asyncio.sleep(warmup)
+        recorder.recording = True
+        start = time.perf_counter()
+        await asyncio.sleep(duration)
+        recorder.recording = False
+        return time.perf_counter() - start
+
+    *_, elapsed = await asyncio.gather(
+        *(worker(i) for i in range(concurrency)), recorder_window()
+    )
+    return {"mode": "closed", "concurrency": concurrency, **recorder.summary(elapsed)}
+
+
+async def open_loop(
+    client: httpx.AsyncClient,
+    corpus: list[bytes],
+    rate: float,
+    duration: float,
+    warmup: float,
+) -> dict:
+    """Fixed arrival rate regardless of responses (no coordinated omission)."""
+    recorder = Recorder()
+    tasks = []
+    start = time.perf_counter()
+    warm_until = start + warmup
+    end = warm_until + duration
+    i = 0
+    while True:
+        # Latency counts from the scheduled send time, not when we got to it
+        scheduled = start + i / rate
+        if scheduled >= end:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        image = corpus[i % len(corpus)]
+        tasks.append(
+            asyncio.create_task(
+                _send(
+                    client,
+                    image,
+                    recorder,
+                    scheduled,
+                    _client_addr(i),
+                    scheduled >= warm_until,
+                )
+            )
+        )
+        i += 1
+    await asyncio.gather(*tasks)
+    return {"mode": "open", "rate_rps": rate, **recorder.summary(duration)}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def launch_server(env: dict[str, str]) -> tuple[subprocess.Popen, str]:
+    """Start ``api.index:app`` under uvicorn and wait for the health check."""
+    port = _free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "api.index:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        # The load generator stands in for a proxy in front of many clients
+        env={**os.environ, "PACER_TRUSTED_PROXIES": "127.0.0.1", **env},
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            if httpx.get(f"{url}/api/").status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError("Server did not become healthy within 60s")
+
+
+async def run(args, url: str, corpus: list[bytes], env: dict) -> list[dict]:
+    results = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        configs = [("closed", c) for c in args.concurrency] + [
+            ("open", r) for r in args.rates
+        ]
+        for mode, value in configs:
+            if mode == "closed":
+                result = await closed_loop(
+                    client, corpus, value, args.duration, args.warmup
+                )
+            else:
+                result = await open_loop(
+                    client, corpus, value, args.duration, args.warmup
+                )
+            result = {"label": args.label, "env": env, **result}
+            results.append(result)
+            print(
+                f"{mode:<7}{value:>8}{result['throughput_rps']:>10}"
+                f"{result['latency_ms_p50']:>10}{result['latency_ms_p95']:>10}"
+                f"{result['latency_ms_p99']:>10}{result['error_rate']:>8.2%}"
+            )
+    return results
+
+
+def main():
+    """Launch (or target) the app, sweep configurations, write results."""
+    args = parse_arguments()
+    env = dict(item.split("=", 1) for item in args.env)
+
+    print(f"Generating {args.images} synthetic {args.image_size}px films...")
+    corpus = synthetic_corpus(args.images, args.image_size)
+
+    proc: Optional[subprocess.Popen] = None
+    url = args.url
+    if url is None:
+        proc, url = launch_server(env)
+        print(f"Launched api.index:app at {url}")
+
+    print("\n" + "=" * 61)
+    print(
+        f"{'mode':<7}{'load':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'errors':>8}"
+    )
+    print("=" * 61)
+    try:
+        results = asyncio.run(run(args, url, corpus, env))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    if args.output:
+        with Path(args.output).open("a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+        print(f"\nResults appended to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
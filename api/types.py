@@ -22,6 +22,14 @@ class Manufacturer(Enum):
     OTHER = "Other"
 
 
+class TileRegion(Struct):
+    # Fractions of the image width/height, origin top-left
+    x: float
+    y: float
+    width: float
+    height: float
+
+
 class MedicalDeviceResult(Struct):
     name: str
     type: DeviceType
@@ -31,8 +39,46 @@ class MedicalDeviceResult(Struct):
     description: str | None = None
     image: str | None = None
     leads: int | None = None
+    region: TileRegion | None = None
 
 
 class ClassScore(Struct):
     class_id: int
     score: float
+    region: TileRegion | None = None
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobSubmission(Struct):
+    job_id: str
+    status: JobStatus
+    images: int
+
+
+class JobItemResult(Struct):
+    index: int
+    results: list[MedicalDeviceResult] | None = None
+    error: str | None = None
+
+
+class JobResult(Struct):
+    job_id: str
+    status: JobStatus
+    created_at: float
+    completed_at: float | None = None
+    items: list[JobItemResult] = []
+
+
+class SaliencyMap(Struct):
+    name: str
+    confidence: float
+    # heatmap[row][col]: drop in confidence when that patch is occluded,
+    # scaled so the largest drop is 1.0
+    heatmap: list[list[float]]
+    max_drop: float